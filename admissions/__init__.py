@@ -76,9 +76,13 @@ je stejně snadné jako u kteréhokoli jiného algoritmu a nepředstavuje žádn
 """
 
 
-from .domain import AdmissionData, Allocation
+from .domain import AdmissionData, FrozenAdmissionData, Allocation, Names
 from .mechanism import Mechanism
 from .deferred_acceptance import DeferredAcceptance
 from .cermat_mechanism import CermatMechanism
 from .naive_mechanism import NaiveMechanism
 from .school_optimal_sm import SchoolOptimalSM
+from .cutoff_mechanism import CutoffMechanism
+from .validation import ValidationReport, InvalidAdmissionData
+from .trace import StudentTrace, TraceIndex
+from .event_log import EventLog, EventLogger, CorruptEventLog
@@ -0,0 +1,192 @@
+import hashlib
+import importlib
+import inspect
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Type
+from .domain import AdmissionData, Allocation
+from .logger import Logger
+from .mechanism import Mechanism
+from .profile import Profile
+
+
+@dataclass
+class CachedResult:
+    allocation: Allocation
+    steps: Optional[List[Dict[str, Any]]] = None
+
+
+class _RecordingLogger(Logger):
+    """Forwards everything to the wrapped logger and records the step data."""
+
+    def __init__(self, logger: Logger):
+        super().__init__()
+        self.logger = logger
+        self.steps = []
+
+    @Logger.name.setter
+    def name(self, value):
+        self._name = value
+        self.logger.name = value
+
+    @property
+    def profile(self) -> Optional[Profile]:
+        return self.logger.profile
+
+    def log_start(self, admission_data: AdmissionData):
+        self.logger.log_start(admission_data)
+
+    def log_step(self, data: Dict):
+        # the wrapped logger may keep and modify the step data
+        self.steps.append(deepcopy(data))
+        self.logger.log_step(data)
+
+    def log_end(self, allocation: Allocation):
+        self.logger.log_end(allocation)
+
+
+_source_hashes: Dict[Type[Mechanism], str] = {}
+
+
+def source_modules(mechanism: Type[Mechanism]) -> List[str]:
+    """
+    Modules of the package the mechanism is built from: modules of its classes, its
+    `source_modules` and everything from the package they import, recursively.
+    """
+    package = Mechanism.__module__.split(".")[0]
+    pending = [
+        klass.__module__
+        for klass in mechanism.__mro__
+        if isinstance(klass, type) and issubclass(klass, Mechanism)
+    ]
+    pending.extend(mechanism.source_modules)
+    modules = set()
+    while pending:
+        name = pending.pop()
+        if name in modules:
+            continue
+        modules.add(name)
+        module = importlib.import_module(name)
+        if hasattr(module, "__path__"):
+            # attributes of packages depend on the submodules imported so far
+            continue
+        for value in vars(module).values():
+            if inspect.ismodule(value):
+                dependency = value.__name__
+            else:
+                dependency = getattr(value, "__module__", None)
+            if isinstance(dependency, str) and dependency.split(".")[0] == package:
+                pending.append(dependency)
+    return sorted(modules)
+
+
+def mechanism_key(mechanism: Type[Mechanism]) -> str:
+    """
+    Identifies the mechanism class, its version and the source code of all
+    modules it is built from, so the key changes whenever the mechanism does.
+    """
+    if mechanism not in _source_hashes:
+        sha = hashlib.sha256()
+        for name in source_modules(mechanism):
+            sha.update(name.encode() + b"\0")
+            sha.update(inspect.getsource(sys.modules[name]).encode())
+        _source_hashes[mechanism] = sha.hexdigest()
+    name = f"{mechanism.__module__}.{mechanism.__qualname__}"
+    return f"{name}:{mechanism.version}:{_source_hashes[mechanism]}"
+
+
+class ResultCache:
+    """
+    Content-addressed cache of mechanism results:
+        - keyed by the fingerprint of AdmissionData and `mechanism_key`
+        - bounded in-memory LRU tier
+        - optional on-disk tier (pickles in `path`), shared across sessions
+    Step history is stored whenever the result is computed with a logger, so the
+    logger can be fed again on a cache hit.
+    """
+
+    def __init__(self, maxsize: int = 128, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self._memory: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, mechanism: Type[Mechanism], data: AdmissionData) -> str:
+        return hashlib.sha256(
+            f"{mechanism_key(mechanism)}|{data.fingerprint()}".encode()
+        ).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".pkl")
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.path is not None and os.path.exists(self._file(key)):
+            with open(self._file(key), "rb") as f:
+                result = pickle.load(f)
+            self._remember(key, result)
+            return result
+        return None
+
+    def put(self, key: str, result: CachedResult):
+        self._remember(key, result)
+        if self.path is not None:
+            file = self._file(key)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            # write to a temporary file first, so that readers never see partial data
+            tmp_file = f"{file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, file)
+
+    def _remember(self, key: str, result: CachedResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        self._memory.clear()
+
+    def evaluate(
+        self,
+        mechanism: Type[Mechanism],
+        data: AdmissionData,
+        logger: Optional[Logger] = None,
+    ) -> Allocation:
+        """
+        Return the allocation of the mechanism on the data, evaluating it only if it is
+        not cached yet. If a logger is given, it receives the same calls as during the
+        evaluation (replayed from the stored step history on a cache hit).
+        """
+        key = self.key(mechanism, data)
+        result = self.get(key)
+        if result is not None and (logger is None or result.steps is not None):
+            self.hits += 1
+            # names are not part of the key, the result is shown in the names of the data
+            allocation = replace(result.allocation, names=data.names)
+            if logger is not None:
+                logger.name = mechanism.__name__
+                logger.log_start(data)
+                for step in result.steps:
+                    # loggers may keep and modify the step data
+                    logger.log_step(deepcopy(step))
+                logger.log_end(allocation)
+            return allocation
+
+        self.misses += 1
+        if logger is None:
+            allocation = mechanism(data).evaluate()
+            self.put(key, CachedResult(allocation=allocation))
+        else:
+            recorder = _RecordingLogger(logger)
+            allocation = mechanism(data, logger=recorder).evaluate()
+            self.put(key, CachedResult(allocation=allocation, steps=recorder.steps))
+        return allocation
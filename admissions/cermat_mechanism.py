@@ -1,8 +1,9 @@
 from copy import deepcopy
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 from .domain import AdmissionData, Allocation
 from .mechanism import Mechanism
 from .logger import Logger
+from .trace import StudentTrace
 
 
 class CermatMechanism(Mechanism):
@@ -36,8 +37,21 @@ class CermatMechanism(Mechanism):
     škol, nikoli studentů.
     """
 
-    def __init__(self, data: AdmissionData, logger: Logger = Logger()):
-        super().__init__(data, logger=logger)
+    state_attributes = (
+        "applicants",
+        "cutoffs",
+        "accepted",
+        "current_best_rank",
+        "current_best_match",
+    )
+
+    def __init__(
+        self,
+        data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
+        super().__init__(data, logger=logger, trace=trace)
         self.applicants = {k: list(v) for k, v in self.exams.items()}
         self.cutoffs = {k: v for k, v in self.seats.items()}
         self.accepted = {s: set() for s in self.schools}
@@ -72,14 +86,22 @@ class CermatMechanism(Mechanism):
     def step(self) -> Dict[str, Any]:
         # -> add matched students to accepted lists
         # -> and remove them from unwanted schools
+        strike_offs = 0
+        struck = []
         for st, sch in self.current_best_match:
             self.accepted[sch].add(st)
             for other_sch in self.applications[st][self.current_best_rank + 1 :]:
                 # remove the students from applications and accepted
                 if st in self.applicants[other_sch]:
                     self.applicants[other_sch].remove(st)
+                    strike_offs += 1
+                    if self.trace is not None:
+                        struck.append((st, other_sch))
                 if st in self.accepted[other_sch]:
                     self.accepted[other_sch].remove(st)
+        self.count(acceptances=len(self.current_best_match), strike_offs=strike_offs)
+        if self.trace is not None:
+            self._trace_step(struck)
         return deepcopy(
             {
                 "__name__": self.__class__.__name__,
@@ -90,6 +112,19 @@ class CermatMechanism(Mechanism):
             }
         )
 
+    def _cutoff(self, sch) -> int:
+        # the last student above the line
+        above = self.applicants[sch][: self.cutoffs[sch]]
+        return self.exam_ranks[sch][above[-1]] if above else -1
+
+    def _trace_step(self, struck):
+        for st, sch in self.current_best_match:
+            rank = self.exam_ranks[sch][st]
+            self.emit("held", st, sch, rank=rank, cutoff=self._cutoff(sch))
+        for st, sch in struck:
+            rank = self.exam_ranks[sch][st]
+            self.emit("struck_off", st, sch, rank=rank, cutoff=self._cutoff(sch))
+
     def allocate(self) -> Allocation:
         accepted = {sch: frozenset(sts) for sch, sts in self.accepted.items()}
         all_accepted = {st for sts in self.accepted.values() for st in sts}
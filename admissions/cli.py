@@ -0,0 +1,263 @@
+"""
+Batch evaluation of admission data from the command line:
+
+    admissions data.json -m da -m cermat --jobs 4 --output results --report --mem
+
+The instance file is a JSON object with `applications` (student -> list of schools),
+`exams` (school -> list of students in the order of the exam results) and `seats`
+(school -> number of seats), optionally with display `names` of `students` and
+`schools`. All ids are read as strings.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Sequence, Type
+from . import metrics
+from .cermat_mechanism import CermatMechanism
+from .cutoff_mechanism import CutoffMechanism
+from .deferred_acceptance import DeferredAcceptance
+from .domain import AdmissionData, Allocation, Names
+from .event_log import EventLogger
+from .logger import Logger
+from .mechanism import Mechanism
+from .naive_mechanism import NaiveMechanism
+from .school_optimal_sm import SchoolOptimalSM
+from .trace import StudentTrace
+
+MECHANISMS: Dict[str, Type[Mechanism]] = {
+    "da": DeferredAcceptance,
+    "cermat": CermatMechanism,
+    "naive": NaiveMechanism,
+    "school-optimal": SchoolOptimalSM,
+    "cutoff": CutoffMechanism,
+}
+
+
+def read_instance(path: str) -> AdmissionData:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    names = raw.get("names", {})
+    return AdmissionData(
+        applications={
+            str(st): tuple(str(sch) for sch in schs)
+            for st, schs in raw["applications"].items()
+        },
+        exams={
+            str(sch): tuple(str(st) for st in sts) for sch, sts in raw["exams"].items()
+        },
+        seats={str(sch): n for sch, n in raw["seats"].items()},
+        names=Names(
+            students={str(k): v for k, v in names.get("students", {}).items()},
+            schools={str(k): v for k, v in names.get("schools", {}).items()},
+        ),
+    ).freeze()
+
+
+def allocation_to_json(allocation: Allocation) -> Dict:
+    allocation = allocation.named()
+    return {
+        "accepted": {
+            str(sch): sorted(map(str, sts)) for sch, sts in allocation.accepted.items()
+        },
+        "rejected": sorted(map(str, allocation.rejected)),
+    }
+
+
+def _mechanism(name: str) -> Type[Mechanism]:
+    by_class = {m.__name__.lower(): m for m in MECHANISMS.values()}
+    mechanism = MECHANISMS.get(name.lower()) or by_class.get(name.lower())
+    if mechanism is None:
+        raise argparse.ArgumentTypeError(
+            f"unknown mechanism {name!r} (choose from {', '.join(MECHANISMS)})"
+        )
+    return mechanism
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="admissions",
+        description="Evaluate admission mechanisms on an instance file.",
+    )
+    parser.add_argument("instance", help="JSON file with the admission data")
+    parser.add_argument(
+        "-m",
+        "--mechanism",
+        action="append",
+        type=_mechanism,
+        dest="mechanisms",
+        help=f"mechanism to run, repeatable ({', '.join(MECHANISMS)}; default: da)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="worker processes, 0 for all the cpus (default: 1)",
+    )
+    parser.add_argument(
+        "-o", "--output", default=".", help="output directory (default: current)"
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="write an HTML report with the steps of every mechanism (small data only)",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="export metrics to PATH (.jsonl for a time series, else Prometheus text)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="seconds between metrics exports (default: 10)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="dump cProfile stats of the main process to PATH",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="write per-student event traces (trace_<mechanism>.npz, runs in-process)",
+    )
+    parser.add_argument(
+        "--event-log",
+        action="store_true",
+        help="write binary event logs for audits (events_<mechanism>.log, in-process)",
+    )
+    parser.add_argument(
+        "--columns",
+        choices=["csv", "npz", "parquet"],
+        help="also write allocation_<mechanism>.<format> with a row per student",
+    )
+    parser.add_argument(
+        "--mem", action="store_true", help="print peak memory usage at the end"
+    )
+    args = parser.parse_args(argv)
+    args.mechanisms = args.mechanisms or [DeferredAcceptance]
+    return args
+
+
+def evaluate(
+    data: AdmissionData,
+    mechanisms: List[Type[Mechanism]],
+    jobs: int = 1,
+    traces: Optional[List[StudentTrace]] = None,
+    loggers: Optional[List[Logger]] = None,
+) -> List[Allocation]:
+    if traces is not None or loggers is not None:
+        traces = traces or [None] * len(mechanisms)
+        loggers = loggers or [Logger() for _ in mechanisms]
+        return [
+            mechanism(data, logger=logger, trace=trace).evaluate()
+            for mechanism, logger, trace in zip(mechanisms, loggers, traces)
+        ]
+    if jobs == 1:
+        return [mechanism(data).evaluate() for mechanism in mechanisms]
+    from .simulation import run_simulations
+
+    return run_simulations([data], mechanisms, jobs=jobs or None)[0]
+
+
+def write_report(data: AdmissionData, mechanisms: List[Type[Mechanism]], path: str):
+    import textwrap
+    from . import reportree as rt
+    from .logger import GraphicLogger
+
+    doc = rt.Doc(title="Admissions")
+    sw = rt.Switcher()
+    for mechanism in mechanisms:
+        logger = GraphicLogger()
+        logger.doc.md(textwrap.dedent(mechanism.__doc__ or ""))
+        mechanism(data, logger=logger).evaluate()
+        sw[mechanism.__name__] = logger.doc
+    # every mechanism is a separate file, loaded when it is shown
+    doc.switcher(sw, lazy=True)
+    doc.save(path=path)
+
+
+def run(args: argparse.Namespace) -> int:
+    os.makedirs(args.output, exist_ok=True)
+    data = read_instance(args.instance)
+    report = data.validate()
+    if report.issues:
+        print(report, file=sys.stderr)
+    if not report.ok:
+        return 1
+
+    traces = [StudentTrace() for _ in args.mechanisms] if args.trace else None
+    loggers = None
+    if args.event_log:
+        loggers = [
+            EventLogger(os.path.join(args.output, f"events_{m.__name__}.log"))
+            for m in args.mechanisms
+        ]
+    start = time.perf_counter()
+    allocations = evaluate(data, args.mechanisms, args.jobs, traces, loggers)
+    elapsed = time.perf_counter() - start
+
+    results = {
+        mechanism.__name__: allocation_to_json(allocation)
+        for mechanism, allocation in zip(args.mechanisms, allocations)
+    }
+    results_path = os.path.join(args.output, "allocations.json")
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.columns:
+        named_data = data.named()
+        for mechanism, allocation in zip(args.mechanisms, allocations):
+            columns = allocation.named().columns(named_data)
+            path = os.path.join(
+                args.output, f"allocation_{mechanism.__name__}.{args.columns}"
+            )
+            getattr(columns, f"to_{args.columns}")(path)
+
+    print(
+        f"{len(data.applications)} students, {len(data.exams)} schools, "
+        f"{len(args.mechanisms)} mechanisms in {elapsed:.3f} s -> {results_path}"
+    )
+    for name, result in results.items():
+        num_accepted = sum(len(sts) for sts in result["accepted"].values())
+        print(f"  {name}: {num_accepted} accepted, {len(result['rejected'])} rejected")
+
+    for mechanism, trace in zip(args.mechanisms, traces or []):
+        trace_path = os.path.join(args.output, f"trace_{mechanism.__name__}.npz")
+        trace.index().save(trace_path)
+        print(f"Trace ({len(trace)} events) -> {trace_path}")
+    for logger in loggers or []:
+        print(f"Event log -> {logger.path}")
+
+    if args.report:
+        report_path = os.path.join(args.output, "report")
+        write_report(data, args.mechanisms, report_path)
+        print(f"Report -> {report_path}")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        if args.metrics:
+            stack.enter_context(metrics.collect(args.metrics, args.metrics_interval))
+        profiler = cProfile.Profile() if args.profile else None
+        if profiler is not None:
+            profiler.enable()
+            stack.callback(profiler.dump_stats, args.profile)
+            stack.callback(profiler.disable)
+        status = run(args)
+    if args.mem:
+        for process, value in metrics.max_rss_bytes().items():
+            print(f"Peak memory ({process}): {value / 2**20:.1f} MiB")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Columnar form of an Allocation: one row per student with the student id, the
+school (as a code into `schools`, -1 if not admitted anywhere) and the rank of the
+school on the application of the student (from 0, -1 if unknown or not admitted).
+
+    columns = allocation.columns(admission_data)
+    columns.to_parquet("allocation.parquet")  # needs pyarrow
+    columns.to_csv("allocation.csv")
+    columns.to_npz("allocation.npz")
+
+The columns are numpy arrays and the exports work on whole columns, without a
+Python loop over the rows.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import chain
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from .domain import AdmissionData, Allocation, SchoolId, ids_from_json, ids_to_json
+
+
+def _csv_text(values: np.ndarray) -> np.ndarray:
+    # text of the values, quoted where the csv module would quote them
+    text = values.astype(str)
+    special = np.zeros(len(text), dtype=bool)
+    for char in (",", '"', "\n", "\r"):
+        special |= np.char.find(text, char) >= 0
+    if not special.any():
+        return text
+    quoted = np.char.add(np.char.add('"', np.char.replace(text, '"', '""')), '"')
+    return np.where(special, quoted, text)
+
+
+def _id_array(ids: Sequence) -> np.ndarray:
+    # ints and strings get a native dtype, anything else (or a mix) stays object
+    kinds = set(map(type, ids))
+    if kinds <= {int}:
+        return np.array(ids, dtype=np.int64)
+    if kinds == {str}:
+        return np.array(ids, dtype=str)
+    # fromiter keeps tuple ids as items, np.array would make them a second axis
+    return np.fromiter(ids, dtype=object, count=len(ids))
+
+
+@dataclass
+class AllocationColumns:
+    student: np.ndarray
+    school: np.ndarray
+    rank: np.ndarray
+    schools: Tuple[SchoolId, ...]
+
+    def __len__(self):
+        return len(self.student)
+
+    @classmethod
+    def from_allocation(
+        cls, allocation: Allocation, admission_data: Optional[AdmissionData] = None
+    ) -> AllocationColumns:
+        """
+        Students are in the order of the applications if the data are given (ranks
+        are known then), otherwise grouped by school with the rejected at the end.
+        """
+        if admission_data is not None:
+            interned = admission_data.interned()
+            school = interned.assignment(allocation)
+            # position of the assigned school in the (padded) application matrix
+            on_application = interned.applications == school[:, None]
+            rank = np.where(school >= 0, on_application.argmax(axis=1), -1)
+            return cls(
+                student=_id_array(interned.students),
+                school=school,
+                rank=rank.astype(np.int32),
+                schools=interned.schools,
+            )
+
+        schools = tuple(allocation.accepted.keys())
+        counts = [len(sts) for sts in allocation.accepted.values()]
+        students = list(chain(*allocation.accepted.values(), allocation.rejected))
+        school = np.full(len(students), -1, dtype=np.int32)
+        school[: sum(counts)] = np.repeat(np.arange(len(schools)), counts)
+        return cls(
+            student=_id_array(students),
+            school=school,
+            rank=np.full(len(students), -1, dtype=np.int32),
+            schools=schools,
+        )
+
+    def school_ids(self) -> np.ndarray:
+        """School id of every row, None for the students not admitted anywhere."""
+        lookup = np.array(self.schools + (None,), dtype=object)
+        return lookup[self.school]
+
+    def to_allocation(self) -> Allocation:
+        order = np.argsort(self.school, kind="stable")
+        bounds = np.searchsorted(
+            self.school[order], np.arange(-1, len(self.schools) + 1)
+        ).tolist()
+        students = self.student[order].tolist()
+        groups = [students[i:j] for i, j in zip(bounds, bounds[1:])]
+        return Allocation(
+            accepted={
+                sch: frozenset(sts) for sch, sts in zip(self.schools, groups[1:])
+            },
+            rejected=frozenset(groups[0]),
+        )
+
+    def to_csv(self, path: str):
+        """Columns student, school, rank, the school is empty if not admitted."""
+        # the text of the schools is looked up by their codes, rows are joined by
+        # array operations
+        schools = np.array([str(sch) for sch in self.schools] + [""])
+        columns = [
+            _csv_text(self.student),
+            _csv_text(schools)[self.school],
+            self.rank.astype(str),
+        ]
+        rows = columns[0]
+        for column in columns[1:]:
+            rows = np.char.add(np.char.add(rows, ","), column)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("student,school,rank\r\n")
+            if len(rows):
+                f.write("\r\n".join(rows.tolist()) + "\r\n")
+
+    def to_npz(self, path: str):
+        """
+        Compressed npz with the columns, the school ids (and the student ids of
+        mixed types) are stored as JSON.
+
+        Raises:
+            ValueError: if the ids are not ints, strings or tuples of them
+        """
+        student = self.student
+        if student.dtype == object:
+            student = np.array(ids_to_json(student.tolist()))
+        np.savez_compressed(
+            path,
+            student=student,
+            school=self.school,
+            rank=self.rank,
+            schools=np.array(ids_to_json(self.schools)),
+        )
+
+    @classmethod
+    def load_npz(cls, path: str) -> AllocationColumns:
+        with np.load(path) as f:
+            student = f["student"]
+            if student.ndim == 0:
+                student = _id_array(ids_from_json(str(student)))
+            return cls(
+                student=student,
+                school=f["school"],
+                rank=f["rank"],
+                schools=tuple(ids_from_json(str(f["schools"]))),
+            )
+
+    def to_parquet(self, path: str):
+        """Parquet file with the school dictionary-encoded, requires pyarrow."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # ids of mixed types (or tuples) are written as their text
+        student = self.student
+        if student.dtype == object:
+            student = np.array([str(st) for st in student.tolist()])
+        schools = _id_array(self.schools)
+        if schools.dtype == object:
+            schools = np.array([str(sch) for sch in self.schools])
+        school = pa.DictionaryArray.from_arrays(
+            pa.array(self.school, mask=self.school < 0), pa.array(schools)
+        )
+        rank = pa.array(self.rank, mask=self.rank < 0)
+        table = pa.table({"student": student, "school": school, "rank": rank})
+        pq.write_table(table, path)
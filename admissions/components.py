@@ -0,0 +1,175 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+import numpy as np
+from .domain import AdmissionData, Allocation, Names
+from .interned import InternedData
+from .mechanism import Mechanism
+from .shared import SharedInstance, SharedInstanceDescriptor, evaluate_shared
+
+
+class _UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int):
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+
+
+def _component_indices(data: AdmissionData) -> List[Tuple[List[int], List[int]]]:
+    # (student indices, school indices) for every component with some students,
+    # indices follow the order of applications and exams
+    students = list(data.applications.keys())
+    student_index = {st: i for i, st in enumerate(students)}
+    school_index = {sch: len(students) + i for i, sch in enumerate(data.exams)}
+
+    uf = _UnionFind(len(students) + len(school_index))
+    for st, schs in data.applications.items():
+        for sch in schs:
+            uf.union(student_index[st], school_index[sch])
+    for sch, sts in data.exams.items():
+        for st in sts:
+            uf.union(student_index[st], school_index[sch])
+
+    components: Dict[int, Tuple[List[int], List[int]]] = {}
+    for i in range(len(students)):
+        components.setdefault(uf.find(i), ([], []))[0].append(i)
+    for j in range(len(school_index)):
+        root = uf.find(len(students) + j)
+        if root in components:
+            components[root][1].append(j)
+    return list(components.values())
+
+
+def connected_components(data: AdmissionData) -> List[AdmissionData]:
+    """
+    Split the admission data into independent sub-instances, one for every weakly
+    connected component of the student-school graph (edges are given by applications
+    and by exam lists). Students and schools keep their original order. Schools without
+    any students are dropped, `merge_allocations` adds them back.
+    """
+    return _split(data, _component_indices(data))
+
+
+def _split(
+    data: AdmissionData, indices: List[Tuple[List[int], List[int]]]
+) -> List[AdmissionData]:
+    students = list(data.applications.keys())
+    schools = list(data.exams.keys())
+    components = []
+    for student_idx, school_idx in indices:
+        comp_schools = [schools[j] for j in school_idx]
+        components.append(
+            AdmissionData(
+                applications={
+                    students[i]: data.applications[students[i]] for i in student_idx
+                },
+                exams={sch: data.exams[sch] for sch in comp_schools},
+                seats={sch: data.seats[sch] for sch in comp_schools},
+                names=data.names,
+            )
+        )
+    return components
+
+
+def merge_allocations(
+    allocations: Iterable[Allocation], data: Optional[AdmissionData] = None
+) -> Allocation:
+    """
+    Merge allocations of disjoint sub-instances. If the full admission data are given,
+    schools are ordered as in its exams and schools missing in all allocations are
+    included with no accepted students.
+    """
+    accepted = {sch: frozenset() for sch in data.exams} if data is not None else {}
+    rejected = set()
+    for allocation in allocations:
+        accepted.update(allocation.accepted)
+        rejected.update(allocation.rejected)
+    names = data.names if data is not None else Names()
+    return Allocation(accepted=accepted, rejected=frozenset(rejected), names=names)
+
+
+def _evaluate_chunk(
+    mechanism: Type[Mechanism],
+    descriptor: SharedInstanceDescriptor,
+    chunk: List[Tuple[np.ndarray, np.ndarray]],
+) -> List[np.ndarray]:
+    return [
+        evaluate_shared(descriptor, mechanism, students=student_idx, schools=school_idx)
+        for student_idx, school_idx in chunk
+    ]
+
+
+def _balanced_chunks(components: List[tuple], num_chunks: int) -> List[List[tuple]]:
+    # greedy: largest components first, always to the currently smallest chunk
+    chunks = [[] for _ in range(num_chunks)]
+    loads = [(0, i) for i in range(num_chunks)]
+    for comp in sorted(components, key=lambda c: len(c[0]), reverse=True):
+        load, i = heapq.heappop(loads)
+        chunks[i].append(comp)
+        heapq.heappush(loads, (load + len(comp[0]), i))
+    return [chunk for chunk in chunks if chunk]
+
+
+def evaluate_by_components(
+    mechanism: Type[Mechanism], data: AdmissionData, jobs: Optional[int] = None
+) -> Allocation:
+    """
+    Evaluate the mechanism separately on every connected component of the data
+    and merge the results. Components never interact in any of the mechanisms,
+    so the allocation is identical to evaluating the full data at once.
+
+    Workers attach to a single shared-memory copy of the instance and receive only
+    the indices of their components. Every worker still builds the AdmissionData of
+    the component it solves (the mechanisms work on it), so its memory is that of
+    its largest component, not of the full instance.
+
+    Args:
+        mechanism: Mechanism class to evaluate.
+        data: Full admission data.
+        jobs: Number of worker processes, `1` evaluates serially in this process
+            and `None` uses all available cores.
+    """
+    indices = _component_indices(data)
+    if jobs == 1 or len(indices) <= 1:
+        # nothing to gain from the workers
+        allocations = [mechanism(comp).evaluate() for comp in _split(data, indices)]
+        return merge_allocations(allocations, data)
+
+    components = [
+        (np.array(sts, dtype=np.int32), np.array(schs, dtype=np.int32))
+        for sts, schs in indices
+    ]
+    interned = InternedData.from_admission_data(data)
+    assignment = np.full(interned.num_students, -1, dtype=np.int32)
+    jobs = jobs or os.cpu_count() or 1
+    with SharedInstance(interned) as shared, ProcessPoolExecutor(jobs) as executor:
+        # a few chunks per worker, so that the work is spread evenly
+        chunks = _balanced_chunks(components, 4 * jobs)
+        futures = [
+            executor.submit(_evaluate_chunk, mechanism, shared.descriptor, chunk)
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            for (student_idx, _), comp_assignment in zip(chunk, future.result()):
+                assignment[student_idx] = comp_assignment
+    allocation = interned.allocation(assignment)
+    allocation.names = data.names
+    return allocation
@@ -0,0 +1,121 @@
+from typing import Any, Dict, Optional
+import numpy as np
+from .domain import AdmissionData, Allocation
+from .mechanism import Mechanism
+from .logger import Logger
+from .trace import StudentTrace
+
+
+class CutoffMechanism(Mechanism):
+    """
+    Mechanismus odloženého přijetí přes přijímací hranice
+    -----------------------------------------------------
+
+    Alternativní výpočet **mechanismu odloženého přijetí** formulovaný pomocí
+    nabídky a poptávky: každá škola má přijímací hranici (čáru) ve svém
+    pořadí výsledků zkoušky a žák je na školu přijatelný, pokud je nad čarou.
+
+    **Algoritmus**
+
+    1. Na začátku má každá škola čáru pod posledním žákem svého seznamu,
+        tedy všichni její uchazeči jsou přijatelní.
+    2. Každý žák si vybere nejvíce preferovanou školu z přihlášky,
+        na které je nad čarou.
+    3. Pokud si školu vybere více žáků, než má míst, škola posune čáru
+        těsně nad prvního žáka, na kterého již nezbylo místo.
+    4. Opakuje se od bodu 2, dokud se žádná čára neposune. Žáci jsou
+        zapsáni na školy, které si v posledním kroku vybrali.
+
+    Čáry se posouvají pouze směrem nahoru a výsledek je shodný s mechanismem
+    odloženého přijetí (stabilní párování optimální pro žáky). Každý krok se
+    však počítá najednou pro všechny žáky pomocí operací nad poli, takže
+    výpočet je vhodný i pro velmi rozsáhlá data.
+    """
+
+    state_attributes = ("cutoffs", "assignment", "_changed")
+    source_modules = ("admissions.interned",)
+
+    def __init__(
+        self,
+        data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
+        super().__init__(data, logger=logger, trace=trace)
+        self.interned = data.interned()
+        self.cutoffs = self.interned.exam_lengths
+        self.assignment = np.full(self.interned.num_students, -1, dtype=np.int32)
+        self._changed = True
+
+    def is_done(self) -> bool:
+        return not self._changed
+
+    def step(self) -> Dict[str, Any]:
+        apps = self.interned.applications
+        ranks = self.interned.exam_ranks
+        seats = self.interned.seats
+        num_schools = self.interned.num_schools
+
+        # 1. every student demands the best school where they are above the cutoff
+        valid = apps >= 0
+        admissible = valid & (ranks < self.cutoffs[np.where(valid, apps, 0)])
+        demanding = np.flatnonzero(admissible.any(axis=1))
+        choice = admissible[demanding].argmax(axis=1)
+        demanded = apps[demanding, choice]
+        demanded_ranks = ranks[demanding, choice]
+
+        # 2. order demand by school and exam rank, find position within the school
+        order = np.lexsort((demanded_ranks, demanded))
+        demanded, demanded_ranks = demanded[order], demanded_ranks[order]
+        demand = np.bincount(demanded, minlength=num_schools)
+        starts = np.cumsum(demand) - demand
+        position = np.arange(len(demanded)) - starts[demanded]
+
+        # 3. overdemanded schools move the cutoff to the first student without a seat
+        first_rejected = position == seats[demanded]
+        last_cutoffs = self.cutoffs.copy()
+        self.cutoffs[demanded[first_rejected]] = demanded_ranks[first_rejected]
+        self._changed = bool(first_rejected.any())
+        self.count(proposals=len(demanding), cutoff_moves=int(first_rejected.sum()))
+
+        within_seats = position < seats[demanded]
+        if self.trace is not None:
+            previous = self.assignment.copy()
+        self.assignment.fill(-1)
+        self.assignment[demanding[order][within_seats]] = demanded[within_seats]
+        if self.trace is not None:
+            self._trace_step(
+                demanding[order], demanded, demanded_ranks, within_seats, previous
+            )
+
+        schools = self.interned.schools
+        return {
+            "__name__": self.__class__.__name__,
+            "Cutoffs": dict(zip(schools, last_cutoffs.tolist())),
+            "Demand": dict(zip(schools, demand.tolist())),
+            "New cutoffs": dict(zip(schools, self.cutoffs.tolist())),
+        }
+
+    def _trace_step(self, students, demanded, demanded_ranks, within_seats, previous):
+        # only changes are recorded: a new seat or a rejection (the cutoff moves
+        # above the student, so it is not repeated), the last seated is the cutoff
+        last_seated = np.full(self.interned.num_schools, -1, dtype=np.int64)
+        np.maximum.at(last_seated, demanded[within_seats], demanded_ranks[within_seats])
+        for st, sch, rank, seated in zip(
+            students.tolist(),
+            demanded.tolist(),
+            demanded_ranks.tolist(),
+            within_seats.tolist(),
+        ):
+            if seated and previous[st] == sch:
+                continue
+            self.emit(
+                "held" if seated else "rejected",
+                self.interned.students[st],
+                self.interned.schools[sch],
+                rank=rank,
+                cutoff=int(last_seated[sch]),
+            )
+
+    def allocate(self) -> Allocation:
+        return self.interned.allocation(self.assignment)
@@ -1,3 +1,4 @@
+import random
 from .domain import AdmissionData
 
 
@@ -227,3 +228,39 @@ def example_cermat():
         student_names=student_names, school_names=school_names
     )
     return example
+
+
+def random_example(
+    num_students: int = 100,
+    num_schools: int = 10,
+    app_len: int = 3,
+    seats: int = 10,
+    seed=None,
+):
+    """
+    Náhodné zadání
+    --------------
+    Náhodně vygenerované přihlášky a výsledky zkoušek, vhodné pro porovnání
+    mechanismů a měření výkonu na větších datech. Výsledky zkoušek vychází
+    ze společné schopnosti žáka a školního šumu, aby se pořadí na školách
+    podobala jako v reálných datech.
+    """
+    rng = random.Random(seed)
+    schools = list(range(num_schools))
+    ability = {st: rng.gauss(0, 1) for st in range(num_students)}
+    applications = {
+        st: tuple(rng.sample(schools, min(app_len, num_schools)))
+        for st in range(num_students)
+    }
+    scores = {sch: {} for sch in schools}
+    for st, schs in applications.items():
+        for sch in schs:
+            scores[sch][st] = ability[st] + rng.gauss(0, 0.5)
+    exams = {
+        sch: tuple(sorted(res, key=res.get, reverse=True)) for sch, res in scores.items()
+    }
+    return AdmissionData(
+        applications=applications,
+        exams=exams,
+        seats={sch: seats for sch in schools},
+    )
@@ -1,8 +1,10 @@
+import heapq
 from copy import deepcopy
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from .domain import AdmissionData, Allocation
 from .mechanism import Mechanism
 from .logger import Logger
+from .trace import StudentTrace
 
 
 class DeferredAcceptance(Mechanism):
@@ -31,40 +33,90 @@ class DeferredAcceptance(Mechanism):
     pro studenty mezi všemi stabilními mechanismy (tedy bez opodstatněné závisti).
     """
 
-    def __init__(self, data: AdmissionData, logger: Logger = Logger()):
-        super().__init__(data, logger=logger)
-        self.rejected = set()  # set of fully rejected students
+    state_attributes = (
+        "rejected",
+        "accepted",
+        "curr_positions",
+        "vacant_seats",
+        "_held",
+        "_free",
+    )
+
+    def __init__(
+        self,
+        data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
+        super().__init__(data, logger=logger, trace=trace)
+        # set of fully rejected students
+        self.rejected = {st for st in self.students if not self.applications[st]}
         self.accepted = {s: set() for s in self.schools}  # conditional acceptance
         self.curr_positions = {s: 0 for s in self.students}
         self.vacant_seats = {k: v for k, v in self.seats.items()}
+        # conditionally accepted students of every school as a max-heap of
+        # (-exam rank, student), the worst of them is on the top
+        self._held = {s: [] for s in self.schools}
+        # students without a conditional acceptance and with a school left on
+        # their application, they apply in the next step
+        self._free = [st for st, app in self.applications.items() if app]
 
     def is_done(self):
         # either all students accepted or no school left on not accepted
         # student's applications
-        all_accepted = {st for x in self.accepted.values() for st in x}
-        not_accepted = self.students - all_accepted
-        is_done = True
-        for st in not_accepted:
-            is_done = is_done and self.curr_positions[st] >= len(self.applications[st])
-        return is_done
+        return not self._free
 
     def step(self) -> Dict[str, Any]:
-        to_compare = {k: v for k, v in self.accepted.items()}
+        if self.record_steps:
+            last_positions = {k: v for k, v in self.curr_positions.items()}
         # select students applying to a given school in this step
-        for st, app in self.applications.items():
-            curr_position = self.curr_positions[st]
-            if curr_position < len(app):  # any school left on application
-                to_compare[app[curr_position]].add(st)
-        last_positions = {k: v for k, v in self.curr_positions.items()}
-        # and now...
-        for sch, res in self.exams.items():
+        applying: Dict[Any, List] = {}
+        for st in self._free:
+            sch = self.applications[st][self.curr_positions[st]]
+            applying.setdefault(sch, []).append(st)
+        if self.record_steps:
+            to_compare = {
+                sch: sts.union(applying.get(sch, ()))
+                for sch, sts in self.accepted.items()
+            }
+        if self.trace is not None:
+            held_before = {sch: set(self.accepted[sch]) for sch in applying}
+        # and now... every applicant is compared with the worst accepted student only
+        rejected = []
+        for sch, sts in applying.items():
+            held = self._held[sch]
+            accepted = self.accepted[sch]
+            ranks = self.exam_ranks[sch]
             num_seats = self.seats[sch]
-            curr_students = to_compare[sch]
-            curr_result = [st for st in res if st in curr_students]
-            self.accepted[sch] = set(curr_result[:num_seats])
-            for st in curr_result[num_seats:]:
-                # move the curr_position for not-acepted students
-                self.curr_positions[st] += 1
+            for st in sts:
+                rank = ranks.get(st)
+                if rank is None:  # missing in the exam results, never accepted
+                    rejected.append(st)
+                elif len(held) < num_seats:
+                    heapq.heappush(held, (-rank, st))
+                    accepted.add(st)
+                elif held and rank < -held[0][0]:
+                    _, worst = heapq.heapreplace(held, (-rank, st))
+                    accepted.remove(worst)
+                    accepted.add(st)
+                    rejected.append(worst)
+                else:
+                    rejected.append(st)
+            self.vacant_seats[sch] = num_seats - len(held)
+            if self.trace is not None:
+                self._trace_school(sch, held_before[sch].union(sts), held_before[sch])
+        # move the curr_position for not-accepted students
+        free = []
+        for st in rejected:
+            self.curr_positions[st] += 1
+            if self.curr_positions[st] < len(self.applications[st]):
+                free.append(st)
+            else:
+                self.rejected.add(st)
+        self.count(proposals=len(self._free), rejections=len(rejected))
+        self._free = free
+        if not self.record_steps:
+            return {"__name__": self.__class__.__name__}
         return deepcopy(
             {
                 "__name__": self.__class__.__name__,
@@ -74,6 +126,25 @@ class DeferredAcceptance(Mechanism):
             }
         )
 
+    def _trace_school(self, sch, to_compare, held_before):
+        # the last student holding a seat after the step is the cutoff
+        ranks = self.exam_ranks[sch]
+        num_seats = self.seats[sch]
+        curr_result = sorted((st for st in to_compare if st in ranks), key=ranks.get)
+        holding = curr_result[:num_seats]
+        cutoff = ranks[holding[-1]] if holding else -1
+        for i, st in enumerate(curr_result):
+            if st not in held_before:
+                self.emit("applied", st, sch, rank=ranks[st], cutoff=cutoff)
+            if i >= num_seats:
+                self.emit("rejected", st, sch, rank=ranks[st], cutoff=cutoff)
+            elif st not in held_before:
+                self.emit("held", st, sch, rank=ranks[st], cutoff=cutoff)
+        for st in to_compare:
+            if st not in ranks:
+                self.emit("applied", st, sch, cutoff=cutoff)
+                self.emit("rejected", st, sch, cutoff=cutoff)
+
     def allocate(self) -> Allocation:
         accepted = {sch: frozenset(sts) for sch, sts in self.accepted.items()}
         all_accepted = {st for sts in self.accepted.values() for st in sts}
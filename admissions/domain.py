@@ -1,9 +1,154 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Tuple, Mapping, FrozenSet, Union
+import hashlib
+import json
+from dataclasses import dataclass, field, replace, FrozenInstanceError
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Tuple,
+    Mapping,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+from frozendict import frozendict
+
+if TYPE_CHECKING:
+    from .columnar import AllocationColumns
+    from .interned import InternedData
+    from .validation import ValidationReport
 
 StudentId = Union[int, str]
 SchoolId = Union[int, str]
+# what ids are: "student", "school" or a tuple of these for pairs of ids
+Role = Union[str, Tuple[str, ...]]
+
+
+def _tuples(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_tuples(x) for x in value)
+    return value
+
+
+def ids_to_json(ids: Sequence[Any]) -> str:
+    """
+    JSON list of student or school ids for the exports. JSON has no tuples, tuple
+    ids are restored by `ids_from_json`.
+
+    Raises:
+        ValueError: if the ids are not ints, strings or tuples of them
+    """
+    ids = list(ids)
+    try:
+        text = json.dumps(ids)
+    except TypeError:
+        text = None
+    if text is None or ids_from_json(text) != ids:
+        raise ValueError("Ids must be ints, strings or tuples of them to be stored")
+    return text
+
+
+def ids_from_json(text: str) -> List[Any]:
+    return [_tuples(x) for x in json.loads(text)]
+
+
+@dataclass(frozen=True)
+class Names:
+    """
+    Display names of students and schools. Mechanisms work on (compact) ids only,
+    the names are resolved at output or logging time. Ids without a name are shown
+    as they are.
+    """
+
+    students: Mapping[StudentId, Any] = field(default_factory=dict)
+    schools: Mapping[SchoolId, Any] = field(default_factory=dict)
+
+    def student(self, st: StudentId) -> Any:
+        return self.students.get(st, st)
+
+    def school(self, sch: SchoolId) -> Any:
+        return self.schools.get(sch, sch)
+
+    @staticmethod
+    def _compose(current: Mapping, new: Optional[Mapping]) -> Mapping:
+        # new names are given for the currently displayed names, ids without a name
+        # are displayed as they are
+        if not new:
+            return current
+        if not current:
+            return new
+        displayed = set(current.values())
+        return {
+            **{i: name for i, name in new.items() if i not in displayed},
+            **{i: new.get(name, name) for i, name in current.items()},
+        }
+
+    def rename(
+        self,
+        student_names: Optional[Mapping[Any, Any]] = None,
+        school_names: Optional[Mapping[Any, Any]] = None,
+    ) -> Names:
+        return Names(
+            students=self._compose(self.students, student_names),
+            schools=self._compose(self.schools, school_names),
+        )
+
+    def resolve_id(self, x: Union[StudentId, SchoolId], role: str) -> Any:
+        """Name of a student or a school, `role` is "student" or "school"."""
+        return self.student(x) if role == "student" else self.school(x)
+
+    def resolve(self, obj: Any, role: Role) -> Any:
+        """
+        Replace ids by names in (nested) mappings and collections, `role` tells what
+        the ids are: keys and items of `obj` have the role, values of mappings the
+        other one (e.g. schools with their students), a tuple of roles is used for
+        pairs like (student, school). Other scalar values (counts, ranks, positions)
+        are kept.
+        """
+        if isinstance(obj, Mapping) and isinstance(role, str):
+            other = "school" if role == "student" else "student"
+            return {
+                self.resolve_id(k, role): self.resolve(v, other) for k, v in obj.items()
+            }
+        if isinstance(obj, tuple) and isinstance(role, tuple) and len(obj) == len(role):
+            return tuple(self._resolve_item(x, r) for x, r in zip(obj, role))
+        if isinstance(obj, (set, frozenset, list, tuple)):
+            return type(obj)(self._resolve_item(x, role) for x in obj)
+        return obj
+
+    def _resolve_item(self, x: Any, role: Role) -> Any:
+        if isinstance(x, (Mapping, set, frozenset, list, tuple)):
+            return self.resolve(x, role)
+        return self.resolve_id(x, role) if isinstance(role, str) else x
+
+    def resolve_step(self, data: Mapping) -> Dict[str, Any]:
+        """Step data of a mechanism with names, see STEP_ROLES."""
+        return {
+            key: self.resolve(value, STEP_ROLES[key]) if key in STEP_ROLES else value
+            for key, value in data.items()
+        }
+
+
+# what the ids in the step data of the mechanisms are (keys of the mappings),
+# other entries are shown as they are
+STEP_ROLES: Dict[str, Role] = {
+    "Position on applications": "student",
+    "Students to compare": "school",
+    "Accepted": "school",
+    "Current best match": ("student", "school"),
+    "Applicants": "school",
+    "Current offers": "student",
+    "Offers": "student",
+    "Remaining applicants": "school",
+    "Remaining seats": "school",
+    "Cutoffs": "school",
+    "Demand": "school",
+    "New cutoffs": "school",
+}
 
 
 @dataclass
@@ -11,69 +156,272 @@ class AdmissionData:
     applications: Mapping[StudentId, Tuple[SchoolId, ...]]
     exams: Mapping[SchoolId, Tuple[StudentId, ...]]
     seats: Mapping[SchoolId, int]
+    # display names only, they are not part of the content (nor the fingerprint)
+    names: Names = field(default_factory=Names, compare=False, repr=False)
 
-    def rename_schools(
-        self, school_names: Mapping[SchoolId, SchoolId]
-    ) -> AdmissionData:
-        new_applications = {
-            st: tuple(school_names[sch] for sch in schs)
-            for st, schs in self.applications.items()
+    def fingerprint(self) -> str:
+        """
+        Stable content hash of the data (same across processes and sessions).
+        Order of students and schools is part of the content, as it determines
+        the order of the outputs.
+        """
+        content = json.dumps(
+            [
+                list(self.applications.items()),
+                list(self.exams.items()),
+                list(self.seats.items()),
+            ],
+            ensure_ascii=False,
+            default=repr,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def student_set(self) -> FrozenSet[StudentId]:
+        return frozenset(self.applications.keys())
+
+    def school_set(self) -> FrozenSet[SchoolId]:
+        return frozenset(self.exams.keys())
+
+    def exam_ranks(self) -> Mapping[SchoolId, Mapping[StudentId, int]]:
+        """Position of every student in the exam results of every school (from 0)."""
+        return {
+            sch: {st: i for i, st in enumerate(sts)} for sch, sts in self.exams.items()
         }
-        new_exams = {
-            school_names[sch]: tuple(st for st in sts)
-            for sch, sts in self.exams.items()
+
+    def application_ranks(self) -> Mapping[StudentId, Mapping[SchoolId, int]]:
+        """Position of every school on the application of every student (from 0)."""
+        return {
+            st: {sch: i for i, sch in enumerate(schs)}
+            for st, schs in self.applications.items()
         }
-        new_seats = {school_names[sch]: n for sch, n in self.seats.items()}
-        return AdmissionData(
-            applications=new_applications, exams=new_exams, seats=new_seats
+
+    def interned(self) -> InternedData:
+        from .interned import InternedData
+
+        return InternedData.from_admission_data(self)
+
+    def validate(self) -> ValidationReport:
+        """Check consistency of applications, exams and seats, see `validation`."""
+        from .validation import validate
+
+        return validate(self)
+
+    def freeze(self) -> FrozenAdmissionData:
+        return FrozenAdmissionData(
+            applications=self.applications,
+            exams=self.exams,
+            seats=self.seats,
+            names=self.names,
         )
 
+    def with_names(self, names: Names) -> AdmissionData:
+        """The same data (no copy) with different display names."""
+        return replace(self, names=names)
+
+    def rename_schools(
+        self, school_names: Mapping[SchoolId, SchoolId]
+    ) -> AdmissionData:
+        return self.with_names(self.names.rename(school_names=school_names))
+
     def rename_students(
         self, student_names: Mapping[StudentId, StudentId]
     ) -> AdmissionData:
-        new_applications = {
-            student_names[st]: tuple(sch for sch in schs)
-            for st, schs in self.applications.items()
-        }
-        new_exams = {
-            sch: tuple(student_names[st] for st in sts)
-            for sch, sts in self.exams.items()
-        }
-        new_seats = {sch: n for sch, n in self.seats.items()}
-        return AdmissionData(
-            applications=new_applications, exams=new_exams, seats=new_seats
-        )
+        return self.with_names(self.names.rename(student_names=student_names))
 
     def rename(
         self,
         student_names: Mapping[StudentId, StudentId],
         school_names: Mapping[SchoolId, SchoolId],
     ) -> AdmissionData:
-        return self.rename_students(student_names).rename_schools(school_names)
+        """
+        Display students and schools under new names. Renaming is lazy, the data keep
+        their ids and the names are resolved only in outputs (loggers, `named`).
+        """
+        return self.with_names(
+            self.names.rename(student_names=student_names, school_names=school_names)
+        )
+
+    def named(self) -> AdmissionData:
+        """Copy of the data with display names used as the ids (e.g. for export)."""
+        st_name, sch_name = self.names.student, self.names.school
+        return AdmissionData(
+            applications={
+                st_name(st): tuple(sch_name(sch) for sch in schs)
+                for st, schs in self.applications.items()
+            },
+            exams={
+                sch_name(sch): tuple(st_name(st) for st in sts)
+                for sch, sts in self.exams.items()
+            },
+            seats={sch_name(sch): n for sch, n in self.seats.items()},
+        )
+
+
+class FrozenAdmissionData(AdmissionData):
+    """
+    Immutable and hashable AdmissionData:
+        - applications, exams and seats are frozendicts of tuples
+        - fingerprint, validation report and derived indexes (rank maps, student
+          and school sets, interned arrays) are computed lazily on the first use and cached
+    so that repeated mechanism construction over the same data reuses them.
+    Derived indexes are shared by all the users and must not be modified.
+    """
+
+    def __init__(
+        self,
+        applications: Mapping[StudentId, Tuple[SchoolId, ...]],
+        exams: Mapping[SchoolId, Tuple[StudentId, ...]],
+        seats: Mapping[SchoolId, int],
+        names: Optional[Names] = None,
+    ):
+        object.__setattr__(
+            self,
+            "applications",
+            frozendict({st: tuple(schs) for st, schs in applications.items()}),
+        )
+        object.__setattr__(
+            self, "exams", frozendict({sch: tuple(sts) for sch, sts in exams.items()})
+        )
+        object.__setattr__(self, "seats", frozendict(seats))
+        object.__setattr__(self, "names", names if names is not None else Names())
+        object.__setattr__(self, "_cache", {})
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __hash__(self):
+        return hash(self.fingerprint())
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenAdmissionData):
+            return self.fingerprint() == other.fingerprint()
+        return NotImplemented
+
+    def __getstate__(self):
+        # derived indexes are cheaper to recompute than to pickle
+        return {k: v for k, v in self.__dict__.items() if k != "_cache"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        object.__setattr__(self, "_cache", {})
+
+    def _cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def fingerprint(self) -> str:
+        return self._cached("fingerprint", super().fingerprint)
+
+    def student_set(self) -> FrozenSet[StudentId]:
+        return self._cached("student_set", super().student_set)
+
+    def school_set(self) -> FrozenSet[SchoolId]:
+        return self._cached("school_set", super().school_set)
+
+    def exam_ranks(self) -> Mapping[SchoolId, Mapping[StudentId, int]]:
+        return self._cached(
+            "exam_ranks",
+            lambda: frozendict(
+                {
+                    sch: frozendict(r)
+                    for sch, r in AdmissionData.exam_ranks(self).items()
+                }
+            ),
+        )
+
+    def application_ranks(self) -> Mapping[StudentId, Mapping[SchoolId, int]]:
+        return self._cached(
+            "application_ranks",
+            lambda: frozendict(
+                {
+                    st: frozendict(r)
+                    for st, r in AdmissionData.application_ranks(self).items()
+                }
+            ),
+        )
+
+    def interned(self) -> InternedData:
+        return self._cached("interned", super().interned)
+
+    def validate(self) -> ValidationReport:
+        return self._cached("validation", super().validate)
+
+    def freeze(self) -> FrozenAdmissionData:
+        return self
+
+    def with_names(self, names: Names) -> FrozenAdmissionData:
+        # share the (immutable) content and the derived indexes
+        renamed = object.__new__(FrozenAdmissionData)
+        renamed.__dict__.update(self.__dict__)
+        object.__setattr__(renamed, "names", names)
+        return renamed
 
 
 @dataclass
 class Allocation:
     accepted: Mapping[SchoolId, FrozenSet[StudentId]]
     rejected: FrozenSet[StudentId]
+    names: Names = field(default_factory=Names, compare=False, repr=False)
+    _student_index: Optional[Dict[StudentId, Optional[SchoolId]]] = field(
+        default=None, init=False, compare=False, repr=False
+    )
+
+    @property
+    def student_index(self) -> Mapping[StudentId, Optional[SchoolId]]:
+        """School of every student (None if rejected), built on the first access."""
+        if self._student_index is None:
+            index: Dict[StudentId, Optional[SchoolId]] = dict.fromkeys(self.rejected)
+            for sch, sts in self.accepted.items():
+                index.update(dict.fromkeys(sts, sch))
+            self._student_index = index
+        return self._student_index
+
+    def school_of(self, st: StudentId) -> Optional[SchoolId]:
+        """
+        Raises:
+            KeyError: if the student is neither accepted nor rejected
+        """
+        return self.student_index[st]
+
+    def columns(
+        self, admission_data: Optional[AdmissionData] = None
+    ) -> AllocationColumns:
+        """Columnar form for exports, ranks on applications are known with the data."""
+        from .columnar import AllocationColumns
+
+        return AllocationColumns.from_allocation(self, admission_data)
 
     def rename_schools(self, school_names: Mapping[SchoolId, SchoolId]) -> Allocation:
-        new_accepted = {school_names[sch]: sts for sch, sts in self.accepted.items()}
-        return Allocation(accepted=new_accepted, rejected=self.rejected)
+        return replace(self, names=self.names.rename(school_names=school_names))
 
     def rename_students(
         self, student_names: Mapping[StudentId, StudentId]
     ) -> Allocation:
-        new_accepted = {
-            sch: frozenset((student_names[st] for st in sts))
-            for sch, sts in self.accepted.items()
-        }
-        new_rejected = frozenset({student_names[st] for st in self.rejected})
-        return Allocation(accepted=new_accepted, rejected=frozenset(new_rejected))
+        return replace(self, names=self.names.rename(student_names=student_names))
 
     def rename(
         self,
         student_names: Mapping[StudentId, StudentId],
         school_names: Mapping[SchoolId, SchoolId],
     ) -> Allocation:
-        return self.rename_students(student_names).rename_schools(school_names)
+        return replace(
+            self,
+            names=self.names.rename(
+                student_names=student_names, school_names=school_names
+            ),
+        )
+
+    def named(self) -> Allocation:
+        """Copy of the allocation with display names used as the ids."""
+        st_name, sch_name = self.names.student, self.names.school
+        return Allocation(
+            accepted={
+                sch_name(sch): frozenset(st_name(st) for st in sts)
+                for sch, sts in self.accepted.items()
+            },
+            rejected=frozenset(st_name(st) for st in self.rejected),
+        )
@@ -0,0 +1,440 @@
+"""
+Append-only binary log of a mechanism run, for audits of how an allocation was
+produced:
+
+    DeferredAcceptance(data, logger=EventLogger("run.log")).evaluate()
+    ...
+    log = EventLog("run.log")  # checks the checksums
+    log.verify(allocation)  # the recorded allocation is the expected one
+    log.reproduce(DeferredAcceptance)  # the mechanism still runs the same way
+    log.replay(GraphicLogger())  # feed any logger after the fact
+
+The log is a sequence of records `kind (u8) | length (u32) | payload | crc (u32)`
+after a magic header. The crc of every record is chained with the previous one,
+so any change, truncation or reordering of the records is detected. Records are:
+    - START: name of the mechanism, fingerprint of the data and the data itself
+    - STEP: data of a step (proposals, holds, rejections, strike-offs, ...) as
+      a difference to the previous step, only changed entries of mappings are stored
+    - END: the allocation and the number of steps
+Values are encoded with a small tagged format (no pickle), strings are written
+once and referenced later, and sets are sorted, so the same run always produces
+the same bytes.
+"""
+
+from __future__ import annotations
+import struct
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from .domain import AdmissionData, Allocation, Names
+from .logger import Logger
+from .mechanism import Mechanism
+
+MAGIC = b"ADMLOG1\n"
+START, STEP, END = 1, 2, 3
+_HEADER = struct.Struct("<BI")
+_CRC = struct.Struct("<I")
+_FLOAT = struct.Struct("<d")
+
+# value tags
+_NONE, _TRUE, _FALSE, _INT, _FLOAT_TAG, _STR, _STR_REF = range(7)
+_LIST, _TUPLE, _SET, _FROZENSET, _DICT, _DEFAULTDICT = range(7, 13)
+_CONTAINERS = {_LIST: list, _TUPLE: tuple, _SET: set, _FROZENSET: frozenset}
+_FACTORIES = (set, list, int, dict)
+
+# modes of the entries of a step
+_SAME, _FULL, _DELTA = range(3)
+
+
+class CorruptEventLog(ValueError):
+    """The log is damaged, modified or does not match the expected run."""
+
+
+def _sort_key(x: Any):
+    return type(x).__name__, x
+
+
+def _sorted(values) -> List:
+    try:
+        return sorted(values, key=_sort_key)
+    except TypeError:
+        return sorted(values, key=repr)
+
+
+class _Encoder:
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+
+    @staticmethod
+    def _uint(out: bytearray, n: int):
+        while n >= 0x80:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def encode(self, value: Any, out: bytearray):
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            # zigzag, so that small negative numbers stay small
+            self._uint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            out.append(_FLOAT_TAG)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            ref = self._strings.get(value)
+            if ref is not None:
+                out.append(_STR_REF)
+                self._uint(out, ref)
+            else:
+                self._strings[value] = len(self._strings)
+                data = value.encode("utf-8")
+                out.append(_STR)
+                self._uint(out, len(data))
+                out += data
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            if isinstance(value, (set, frozenset)):
+                out.append(_SET if isinstance(value, set) else _FROZENSET)
+                value = _sorted(value)
+            else:
+                out.append(_LIST if isinstance(value, list) else _TUPLE)
+            self._uint(out, len(value))
+            for x in value:
+                self.encode(x, out)
+        elif isinstance(value, dict):
+            if isinstance(value, defaultdict):
+                out.append(_DEFAULTDICT)
+                self._uint(out, _FACTORIES.index(value.default_factory))
+            else:
+                out.append(_DICT)
+            self._uint(out, len(value))
+            for k, v in value.items():
+                self.encode(k, out)
+                self.encode(v, out)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} into the event log")
+
+
+class _Decoder:
+    def __init__(self, strings: Optional[List[str]] = None):
+        self._strings: List[str] = list(strings or [])
+
+    def decode(self, buf: bytes) -> Any:
+        self._buf = buf
+        self._pos = 0
+        return self._value()
+
+    def _uint(self) -> int:
+        n = shift = 0
+        while True:
+            b = self._buf[self._pos]
+            self._pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def _value(self) -> Any:
+        tag = self._buf[self._pos]
+        self._pos += 1
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            n = self._uint()
+            return n // 2 if n % 2 == 0 else -(n + 1) // 2
+        if tag == _FLOAT_TAG:
+            (value,) = _FLOAT.unpack_from(self._buf, self._pos)
+            self._pos += _FLOAT.size
+            return value
+        if tag == _STR:
+            length = self._uint()
+            value = self._buf[self._pos : self._pos + length].decode("utf-8")
+            self._pos += length
+            self._strings.append(value)
+            return value
+        if tag == _STR_REF:
+            return self._strings[self._uint()]
+        if tag in _CONTAINERS:
+            return _CONTAINERS[tag](self._value() for _ in range(self._uint()))
+        if tag in (_DICT, _DEFAULTDICT):
+            value = defaultdict(_FACTORIES[self._uint()]) if tag == _DEFAULTDICT else {}
+            for _ in range(self._uint()):
+                k = self._value()
+                value[k] = self._value()
+            return value
+        raise CorruptEventLog(f"Unknown value tag {tag}")
+
+
+def _data_to_plain(data: AdmissionData) -> Dict:
+    return {
+        "applications": {st: list(schs) for st, schs in data.applications.items()},
+        "exams": {sch: list(sts) for sch, sts in data.exams.items()},
+        "seats": dict(data.seats),
+        "names": {
+            "students": dict(data.names.students),
+            "schools": dict(data.names.schools),
+        },
+    }
+
+
+def _data_from_plain(plain: Dict) -> AdmissionData:
+    return AdmissionData(
+        applications={st: tuple(schs) for st, schs in plain["applications"].items()},
+        exams={sch: tuple(sts) for sch, sts in plain["exams"].items()},
+        seats=plain["seats"],
+        names=Names(**plain["names"]),
+    ).freeze()
+
+
+class EventLogger(Logger):
+    """
+    Writes the event log of the run to `path` (combine with other loggers through
+    MultiLogger). The admission data are embedded unless `include_data` is False,
+    then they have to be provided for the replay.
+    """
+
+    def __init__(self, path: str, include_data: bool = True):
+        super().__init__()
+        self.path = path
+        self.include_data = include_data
+        self._file = None
+
+    def _write(self, kind: int, value: Any):
+        payload = bytearray()
+        self._encoder.encode(value, payload)
+        record = _HEADER.pack(kind, len(payload)) + payload
+        self._crc = zlib.crc32(record, self._crc)
+        self._file.write(record + _CRC.pack(self._crc))
+
+    def log_start(self, admission_data: AdmissionData):
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC)
+        self._encoder = _Encoder()
+        self._crc = 0
+        self._num_steps = 0
+        self._prev: Dict = {}
+        self._write(
+            START,
+            {
+                "mechanism": self.name,
+                "fingerprint": admission_data.fingerprint(),
+                "data": _data_to_plain(admission_data) if self.include_data else None,
+            },
+        )
+
+    def log_step(self, data: Dict):
+        entries = []
+        for key, value in data.items():
+            prev = self._prev.get(key)
+            if key in self._prev and prev == value and type(prev) is type(value):
+                entries.append([key, _SAME])
+                continue
+            if isinstance(value, dict) and type(prev) is type(value):
+                changed = {k: v for k, v in value.items() if prev.get(k, v) != v}
+                changed.update({k: value[k] for k in value.keys() - prev.keys()})
+                removed = [k for k in prev if k not in value]
+                # the order of the keys has to be kept as well
+                merged = dict(prev)
+                merged.update(changed)
+                for k in removed:
+                    del merged[k]
+                if list(merged) == list(value):
+                    entries.append([key, _DELTA, changed, removed])
+                    continue
+            entries.append([key, _FULL, value])
+        self._num_steps += 1
+        self._prev = data
+        self._write(STEP, entries)
+
+    def log_end(self, allocation: Allocation):
+        self._write(
+            END,
+            {
+                "accepted": {
+                    sch: _sorted(sts) for sch, sts in allocation.accepted.items()
+                },
+                "rejected": _sorted(allocation.rejected),
+                "steps": self._num_steps,
+            },
+        )
+        self._file.close()
+        self._file = None
+
+
+class EventLog:
+    """
+    Reader of the event log, the checksums are verified when the log is opened.
+
+    Raises:
+        CorruptEventLog: if the log is damaged or incomplete
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            buf = f.read()
+        if not buf.startswith(MAGIC):
+            raise CorruptEventLog(f"{path} is not an event log")
+        self._records: List[Tuple[int, bytes]] = []
+        pos, crc = len(MAGIC), 0
+        while pos < len(buf):
+            if pos + _HEADER.size > len(buf):
+                raise CorruptEventLog("Truncated record header")
+            kind, length = _HEADER.unpack_from(buf, pos)
+            end = pos + _HEADER.size + length
+            if end + _CRC.size > len(buf):
+                raise CorruptEventLog("Truncated record")
+            crc = zlib.crc32(buf[pos:end], crc)
+            if _CRC.unpack_from(buf, end)[0] != crc:
+                raise CorruptEventLog(
+                    f"Checksum mismatch in record {len(self._records)}"
+                )
+            self._records.append((kind, buf[pos + _HEADER.size : end]))
+            pos = end + _CRC.size
+
+        kinds = [kind for kind, _ in self._records]
+        if not kinds or kinds[0] != START or kinds[-1] != END:
+            raise CorruptEventLog("The log has to start with START and end with END")
+        if set(kinds[1:-1]) - {STEP}:
+            raise CorruptEventLog("Unexpected record in the steps")
+
+        # strings are shared by all records, so they are decoded in order
+        self._decoder = _Decoder()
+        start = self._decoder.decode(self._records[0][1])
+        self._start_strings = self._decoder._strings
+        self._steps = [payload for _, payload in self._records[1:-1]]
+        self._end_payload = self._records[-1][1]
+        self.mechanism: str = start["mechanism"]
+        self.fingerprint: str = start["fingerprint"]
+        self.admission_data: Optional[AdmissionData] = (
+            _data_from_plain(start["data"]) if start["data"] is not None else None
+        )
+        self._end = None
+
+    @property
+    def num_steps(self) -> int:
+        return len(self._steps)
+
+    def steps(self) -> Iterator[Dict]:
+        """
+        Data of all steps in order, as they were logged. Values unchanged since the
+        previous step are shared with it, so they should be treated as read-only.
+        """
+        decoder = _Decoder(self._start_strings)
+        prev: Dict = {}
+        for payload in self._steps:
+            data = {}
+            for entry in decoder.decode(payload):
+                key, mode = entry[0], entry[1]
+                if mode == _SAME:
+                    data[key] = prev[key]
+                elif mode == _FULL:
+                    data[key] = entry[2]
+                else:
+                    changed, removed = entry[2], entry[3]
+                    value = prev[key].copy()
+                    value.update(changed)
+                    for k in removed:
+                        del value[k]
+                    data[key] = value
+            prev = data
+            yield data
+        self._end = decoder.decode(self._end_payload)
+
+    def step_data(self, step: int) -> Dict:
+        """Data of the step (from 1), i.e. the state of the mechanism after it."""
+        if not 1 <= step <= self.num_steps:
+            raise IndexError(f"Step {step} out of 1..{self.num_steps}")
+        for i, data in enumerate(self.steps(), start=1):
+            if i == step:
+                return data
+
+    @property
+    def allocation(self) -> Allocation:
+        if self._end is None:
+            for _ in self.steps():
+                pass
+        names = self.admission_data.names if self.admission_data else Names()
+        return Allocation(
+            accepted={
+                sch: frozenset(sts) for sch, sts in self._end["accepted"].items()
+            },
+            rejected=frozenset(self._end["rejected"]),
+            names=names,
+        )
+
+    def _admission_data(self, admission_data: Optional[AdmissionData]):
+        admission_data = admission_data or self.admission_data
+        if admission_data is None:
+            raise ValueError("The log does not contain the data, provide them")
+        if admission_data.fingerprint() != self.fingerprint:
+            raise CorruptEventLog("The data do not match the logged run")
+        return admission_data
+
+    def verify(
+        self,
+        allocation: Optional[Allocation] = None,
+        admission_data: Optional[AdmissionData] = None,
+    ):
+        """
+        Check that the recorded steps are complete, that the data match the logged
+        run and that the recorded allocation is the given one (if any).
+
+        Raises:
+            CorruptEventLog: if any of the checks fails
+        """
+        if self.admission_data is not None or admission_data is not None:
+            self._admission_data(admission_data)
+        recorded = self.allocation
+        if self._end["steps"] != self.num_steps:
+            raise CorruptEventLog("Number of the steps does not match")
+        if allocation is not None and (
+            recorded.accepted != allocation.accepted
+            or recorded.rejected != allocation.rejected
+        ):
+            raise CorruptEventLog("The allocation does not match the logged one")
+
+    def replay(
+        self, logger: Logger, admission_data: Optional[AdmissionData] = None
+    ) -> Allocation:
+        """Feed the logger with the logged run, as if the mechanism was evaluated."""
+        admission_data = self._admission_data(admission_data)
+        logger.name = self.mechanism
+        logger.log_start(admission_data)
+        for data in self.steps():
+            logger.log_step(data)
+        allocation = self.allocation
+        allocation.names = admission_data.names
+        logger.log_end(allocation)
+        return allocation
+
+    def reproduce(
+        self,
+        mechanism: Type[Mechanism],
+        admission_data: Optional[AdmissionData] = None,
+    ):
+        """
+        Evaluate the mechanism again and compare every step with the log.
+
+        Raises:
+            CorruptEventLog: at the first difference
+        """
+        admission_data = self._admission_data(admission_data)
+        if mechanism.__name__ != self.mechanism:
+            raise CorruptEventLog(f"The log was written by {self.mechanism}")
+        mech = mechanism(admission_data)
+        logged = self.steps()
+        for i, data in enumerate(mech.iter_steps(), start=1):
+            if next(logged, None) != data:
+                raise CorruptEventLog(f"Step {i} differs from the log")
+        if next(logged, None) is not None:
+            raise CorruptEventLog("The log has more steps than the run")
+        self.verify(mech.allocate())
@@ -0,0 +1,128 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from .domain import AdmissionData, Allocation, StudentId, SchoolId
+
+# rank used for students missing from the exam list of a school they applied to,
+# it never gets under any cutoff
+NOT_RANKED = np.iinfo(np.int32).max
+
+
+@dataclass
+class InternedData:
+    """
+    Array-backed form of AdmissionData:
+        - students and schools are replaced by their positions in `students` and `schools`
+        - applications are a padded (num_students x max_app_len) matrix, -1 marks padding
+        - exam_ranks has the same shape and holds the position of the student in the exam
+          list of the given school (NOT_RANKED if the student is not listed there)
+        - exams are stored in CSR layout (exam_students sliced by exam_offsets)
+    """
+
+    students: Tuple[StudentId, ...]
+    schools: Tuple[SchoolId, ...]
+    applications: np.ndarray
+    exam_ranks: np.ndarray
+    exam_students: np.ndarray
+    exam_offsets: np.ndarray
+    seats: np.ndarray
+
+    @classmethod
+    def from_admission_data(cls, data: AdmissionData) -> InternedData:
+        students = tuple(data.applications.keys())
+        schools = tuple(data.exams.keys())
+        student_index = {st: i for i, st in enumerate(students)}
+        school_index = {sch: i for i, sch in enumerate(schools)}
+
+        exam_rank = data.exam_ranks()
+        # at least one (padding) column, so that the matrices are never degenerate
+        max_app_len = max([1] + [len(app) for app in data.applications.values()])
+        applications = np.full((len(students), max_app_len), -1, dtype=np.int32)
+        exam_ranks = np.full((len(students), max_app_len), NOT_RANKED, dtype=np.int32)
+        for i, (st, app) in enumerate(data.applications.items()):
+            applications[i, : len(app)] = [school_index[sch] for sch in app]
+            exam_ranks[i, : len(app)] = [
+                exam_rank[sch].get(st, NOT_RANKED) for sch in app
+            ]
+
+        exam_lengths = [len(sts) for sts in data.exams.values()]
+        exam_offsets = np.zeros(len(schools) + 1, dtype=np.int64)
+        np.cumsum(exam_lengths, out=exam_offsets[1:])
+        exam_students = np.fromiter(
+            (student_index[st] for sts in data.exams.values() for st in sts),
+            dtype=np.int32,
+            count=int(exam_offsets[-1]),
+        )
+        seats = np.array([data.seats[sch] for sch in schools], dtype=np.int32)
+
+        return cls(
+            students=students,
+            schools=schools,
+            applications=applications,
+            exam_ranks=exam_ranks,
+            exam_students=exam_students,
+            exam_offsets=exam_offsets,
+            seats=seats,
+        )
+
+    @property
+    def num_students(self) -> int:
+        return len(self.students)
+
+    @property
+    def num_schools(self) -> int:
+        return len(self.schools)
+
+    @property
+    def exam_lengths(self) -> np.ndarray:
+        return np.diff(self.exam_offsets).astype(np.int32)
+
+    def exam(self, school: int) -> np.ndarray:
+        start, end = self.exam_offsets[school], self.exam_offsets[school + 1]
+        return self.exam_students[start:end]
+
+    def to_admission_data(
+        self,
+        students: Optional[Iterable[int]] = None,
+        schools: Optional[Iterable[int]] = None,
+    ) -> AdmissionData:
+        """
+        AdmissionData with compact ids (indices of students and schools), optionally
+        restricted to the given students and schools (e.g. a connected component).
+        """
+        students = range(self.num_students) if students is None else students
+        schools = range(self.num_schools) if schools is None else schools
+        applications = {}
+        for st in students:
+            app = self.applications[st]
+            applications[int(st)] = tuple(app[app >= 0].tolist())
+        exams = {int(sch): tuple(self.exam(sch).tolist()) for sch in schools}
+        seats = {sch: int(self.seats[sch]) for sch in exams}
+        return AdmissionData(applications=applications, exams=exams, seats=seats)
+
+    def allocation(self, assignment: np.ndarray) -> Allocation:
+        """
+        Convert an assignment array (school index for every student, -1 if rejected)
+        back to an Allocation in the original ids.
+        """
+        accepted: Dict[SchoolId, set] = {sch: set() for sch in self.schools}
+        rejected = set()
+        for st, sch in zip(self.students, assignment.tolist()):
+            if sch < 0:
+                rejected.add(st)
+            else:
+                accepted[self.schools[sch]].add(st)
+        return Allocation(
+            accepted={sch: frozenset(sts) for sch, sts in accepted.items()},
+            rejected=frozenset(rejected),
+        )
+
+    def assignment(self, allocation: Allocation) -> np.ndarray:
+        """Inverse of `allocation`: the school index for every student, -1 if rejected."""
+        student_index = {st: i for i, st in enumerate(self.students)}
+        assignment = np.full(len(self.students), -1, dtype=np.int32)
+        for j, sch in enumerate(self.schools):
+            for st in allocation.accepted.get(sch, ()):
+                assignment[student_index[st]] = j
+        return assignment
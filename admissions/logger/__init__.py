@@ -1,4 +1,20 @@
+from typing import TYPE_CHECKING
 from .logger import Logger
 from .basic_logger import BasicLogger
-from .doc_logger import DocLogger
-from .full_loggers import GraphicLogger
+from .multi_logger import MultiLogger
+from .timing_logger import TimingLogger
+from ..reportree.lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from .doc_logger import DocLogger
+    from .full_loggers import GraphicLogger
+
+# loggers writing reports need the whole reportree stack (matplotlib, pandas, ...),
+# they are imported only on the first access, so mechanisms start fast
+__getattr__, __dir__ = lazy_attributes(
+    globals(),
+    {
+        "DocLogger": ".doc_logger",
+        "GraphicLogger": ".full_loggers",
+    },
+)
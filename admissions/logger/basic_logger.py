@@ -1,6 +1,6 @@
-from typing import Mapping
+from typing import Mapping, Optional
 from .logger import Logger
-from ..domain import AdmissionData, Allocation
+from ..domain import AdmissionData, Allocation, Names
 
 
 class BasicLogger(Logger):
@@ -13,18 +13,27 @@ class BasicLogger(Logger):
     def __init__(self):
         super().__init__()
         self._num_steps = 0
+        self._names = Names()
 
-    def pretty_dict(self, data: Mapping):
-        """Pomocná třída pro hezčí výpis dictionaries."""
+    def pretty_dict(self, data: Mapping, role: Optional[str] = None):
+        """
+        Pomocná třída pro hezčí výpis dictionaries. `role` určuje, zda jsou klíče
+        žáci ("student"), nebo školy ("school"), bez ní jde o data kroku mechanismu.
+        """
+        if role is None:
+            data = self._names.resolve_step(data)
+        else:
+            data = self._names.resolve(data, role)
         return "{\n" + "\n".join([f"    {k}: {v}" for k, v in data.items()]) + "\n}\n"
 
     def log_start(self, admission_data: AdmissionData):
+        self._names = admission_data.names
         print(f"===  {self.name}  ===")
         print(
-            f"Students' applications: {self.pretty_dict(admission_data.applications)}"
+            f"Students' applications: {self.pretty_dict(admission_data.applications, 'student')}"
         )
-        print(f"School capacities: {self.pretty_dict(admission_data.seats)}")
-        print(f"School results: {self.pretty_dict(admission_data.exams)}")
+        print(f"School capacities: {self.pretty_dict(admission_data.seats, 'school')}")
+        print(f"School results: {self.pretty_dict(admission_data.exams, 'school')}")
         print()
 
     def log_step(self, data: Mapping):
@@ -36,6 +45,6 @@ class BasicLogger(Logger):
     def log_end(self, allocation: Allocation):
         print("===  RESULTS  ===")
         print(f"Num steps: {self._num_steps}")
-        print(f"Accepted: {self.pretty_dict(allocation.accepted)}")
-        print(f"Rejected: {allocation.rejected}")
+        print(f"Accepted: {self.pretty_dict(allocation.accepted, 'school')}")
+        print(f"Rejected: {self._names.resolve(allocation.rejected, 'student')}")
         print()
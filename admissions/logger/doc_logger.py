@@ -1,6 +1,6 @@
-from typing import Mapping
+from typing import Mapping, Optional
 from .logger import Logger
-from ..domain import AdmissionData, Allocation
+from ..domain import AdmissionData, Allocation, Names
 from .. import reportree as rt
 
 
@@ -17,10 +17,18 @@ class DocLogger(Logger):
     def __init__(self, *args, **kwargs):
         super().__init__()
         self._num_steps = 0
+        self._names = Names()
         self.doc = rt.Doc(*args, **kwargs)
 
-    def pretty_dict(self, data: Mapping):
-        """Pomocná třída pro hezčí výpis dictionaries."""
+    def pretty_dict(self, data: Mapping, role: Optional[str] = None):
+        """
+        Pomocná třída pro hezčí výpis dictionaries. `role` určuje, zda jsou klíče
+        žáci ("student"), nebo školy ("school"), bez ní jde o data kroku mechanismu.
+        """
+        if role is None:
+            data = self._names.resolve_step(data)
+        else:
+            data = self._names.resolve(data, role)
         with self.doc.tag("ul"):
             for k, v in data.items():
                 with self.doc.tag("li"):
@@ -28,15 +36,16 @@ class DocLogger(Logger):
                     self.doc.text(f"{v}\n")
 
     def log_start(self, admission_data: AdmissionData):
+        self._names = admission_data.names
         self.doc.line(self._header, f"ADMISSION DATA")
         self.doc.line(self._subheader, "Students' applications")
-        self.pretty_dict(admission_data.applications)
+        self.pretty_dict(admission_data.applications, "student")
 
         self.doc.line(self._subheader, "School capacities")
-        self.pretty_dict(admission_data.seats)
+        self.pretty_dict(admission_data.seats, "school")
 
         self.doc.line(self._subheader, "School results")
-        self.pretty_dict(admission_data.exams)
+        self.pretty_dict(admission_data.exams, "school")
 
     def log_step(self, data: Mapping):
         self._num_steps += 1
@@ -47,7 +56,9 @@ class DocLogger(Logger):
         self.doc.line(self._header, "RESULTS")
         self.doc.line("div", f"Num steps: {self._num_steps}")
         self.doc.line(self._subheader, "Accepted")
-        self.pretty_dict(allocation.accepted)
+        self.pretty_dict(allocation.accepted, "school")
         self.doc.line(self._subheader, "Rejected")
         with self.doc.tag("ul"):
-            self.doc.line("li", str(allocation.rejected))
+            self.doc.line(
+                "li", str(self._names.resolve(allocation.rejected, "student"))
+            )
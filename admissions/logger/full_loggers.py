@@ -1,16 +1,39 @@
-from os import waitid_result
-from typing import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, List, Mapping, Optional, Tuple
 from .logger import Logger
-from ..domain import AdmissionData, Allocation
+from ..domain import STEP_ROLES, AdmissionData, Allocation, Names, Role
 from .. import reportree as rt
 
 
+@dataclass
+class _Layout:
+    """
+    Everything the step tables of a run are built from that does not change between
+    the steps, so that a step renders only the colour classes of the cells.
+    """
+
+    schools: List[Any]
+    # students sorted by their names, split into the rows of the wide table
+    student_chunks: List[List[Any]]
+    max_exam_len: int
+    max_app_len: int
+    # HTML of the header row of the exam tables (schools and their seats)
+    exam_header: str
+    # (student, school, inner HTML of the cell) for every rank of every school, None
+    # past the end of the exam results of a school
+    exam_cells: List[List[Optional[Tuple[Any, Any, str]]]]
+
+
 class GraphicLogger(Logger):
     """
     Full graphic logger
     - can output generic classes - AdmissionData and AllocationData into nice tables
     - can be further extended to handle properly the step output of different mechanism
       with more fine-tuned output
+    - steps are rendered as they come (they do not depend on the final allocation), so
+      the step data are not kept until the end
+    - steps of large instances show only the values changed in the step, the rows
+      beyond the first few are loaded in the browser on demand
     """
 
     _header = "h3"
@@ -20,22 +43,125 @@ class GraphicLogger(Logger):
 
     _table_klass = "admission"
 
-    def __init__(self, *args, **kwargs):
+    # instances with larger exam tables (ranks x schools) are rendered as changes only
+    _large_threshold = 2000
+    _large_visible_rows = 20
+
+    def __init__(self, *args, large: Optional[bool] = None, **kwargs):
         super().__init__()
         self._num_steps = 0
         self.doc = rt.Doc(*args, **kwargs)
-        self._step_data = []
+        self._steps_doc = rt.Doc()
+        self._names = Names()
+        self.large = large
+        self._is_large = False
+        self._layout: Optional[_Layout] = None
+        self._prev_step = {}
+
+    def _student_name(self, st):
+        return str(self._names.student(st))
+
+    def _school_name(self, sch):
+        return str(self._names.school(sch))
+
+    def _exam_cell_text(self, st, sch):
+        # student name and the rank of the school on their application
+        rank = self._application_school_rank[st][sch]
+        return f"  {self._names.student(st)} (#{rank})"
 
     def log_start(self, admission_data: AdmissionData):
         self._admission_data = admission_data
+        self._names = admission_data.names
         self._application_school_rank = {
             st: {sch: i + 1 for i, sch in enumerate(schs)}
             for st, schs in admission_data.applications.items()
         }
+        exams = admission_data.exams
+        max_exam_len = max((len(ex) for ex in exams.values()), default=0)
+        self._is_large = (
+            self.large
+            if self.large is not None
+            else max_exam_len * len(exams) > self._large_threshold
+        )
+        if self._is_large:
+            self._exam_ranks = admission_data.exam_ranks()
+            self._prev_step = {}
+        else:
+            self._layout = self._build_layout(admission_data, max_exam_len)
+        # state of the step renderers, carried from one step to the next
+        self._num_steps = 0
+        self._prev_accepted = {sch: set() for sch in exams}
+        self._prev_removed = {sch: set() for sch in exams}
+        self._prev_rejected = {sch: set() for sch in exams}
 
-    def log_step(self, data: Mapping):
-        self._num_steps += 1
-        self._step_data.append(data)
+    def _build_layout(self, admission_data: AdmissionData, max_exam_len: int):
+        schools = list(admission_data.exams.keys())
+        applications = admission_data.applications
+        students = sorted(list(applications.keys()), key=self._student_name)
+        student_chunks = []
+        i = -1
+        for i in range((len(students) - 1) // 8):
+            student_chunks.append(students[i * 8 : (i + 1) * 8])
+        student_chunks.append(students[(i + 1) * 8 :])
+
+        doc = rt.Doc()
+        with doc.tag("tr"):
+            doc.line("th", "")
+            for sch in schools:
+                with doc.tag("th", klass="exam-school"):
+                    doc.line("i", "", klass="bi bi-house-fill")
+                    doc.text(f"  {self._names.school(sch)}")
+                    doc.stag("br")
+                    doc.line(
+                        "small",
+                        f"Míst = {admission_data.seats[sch]}",
+                        style="font-weight: normal;",
+                    )
+        exam_header = doc.getvalue()
+
+        exam_cells = []
+        for i in range(max_exam_len):
+            row = []
+            for sch in schools:
+                exam = admission_data.exams[sch]
+                if i >= len(exam):
+                    row.append(None)
+                    continue
+                st = exam[i]
+                doc = rt.Doc()
+                doc.line("i", "", klass="bi bi-person-fill")
+                doc.text(self._exam_cell_text(st, sch))
+                row.append((st, sch, doc.getvalue()))
+            exam_cells.append(row)
+
+        return _Layout(
+            schools=schools,
+            student_chunks=student_chunks,
+            max_exam_len=max_exam_len,
+            max_app_len=max((len(app) for app in applications.values()), default=0),
+            exam_header=exam_header,
+            exam_cells=exam_cells,
+        )
+
+    def _exam_table(self, doc: rt.Doc, cell_klass: Callable[[int, Any, Any], str]):
+        """
+        Exam results of all schools (ranks x schools), `cell_klass(i, st, sch)` gives
+        the colour classes of the cells, it is called in the row order. The cells past
+        the end of the exam results of a school are empty.
+        """
+        layout = self._layout
+        with doc.tag("table", klass=self._table_klass):
+            doc.asis(layout.exam_header)
+            for i, row in enumerate(layout.exam_cells):
+                with doc.tag("tr"):
+                    doc.line("th", f"{i + 1}.")
+                    for cell_data in row:
+                        if cell_data is None:
+                            doc.asis("<td></td>")
+                            continue
+                        st, sch, cell = cell_data
+                        klass = cell_klass(i, st, sch)
+                        doc.asis(f'<td class="exam-student {klass}">{cell}</td>')
 
     def at_end_log_start(self, admission_data: AdmissionData):
         doc = self.doc
@@ -60,49 +186,27 @@ class GraphicLogger(Logger):
                 with doc.tag("tr"):
                     with doc.tag("th", klass="app-student"):
                         doc.line("i", "", klass="bi bi-person-fill")
-                        doc.text(f"  {st}")
+                        doc.text(f"  {self._names.student(st)}")
                     for sch in schs:
                         extra_klass = (
                             "green-black" if st in accepted[sch] else "red-black"
                         )
-                        doc.line("td", str(sch), klass=extra_klass)
-
-        schools = list(admission_data.exams.keys())
-        max_exam_len = max([len(ex) for ex in admission_data.exams.values()])
+                        doc.line("td", str(self._names.school(sch)), klass=extra_klass)
 
         doc.line(self._subheader, "Výsledky školních zkoušek")
         doc.line(
             "div", "Čísla v závorce označují pořadí školy na přihlášce daného žáka."
         )
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = admission_data.exams[sch][i]
-                        extra_klass = (
-                            "green-black" if st in accepted[sch] else "red-black"
-                        )
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        self._exam_table(
+            doc,
+            lambda i, st, sch: "green-black" if st in accepted[sch] else "red-black",
+        )
 
-    def at_end_log_step(self, data: Mapping):
+    def log_step(self, data: Mapping):
         self._num_steps += 1
+        if self._is_large:
+            self.log_step_large(data)
+            return
         if "__name__" not in data:
             return
         mech = data["__name__"]
@@ -115,14 +219,14 @@ class GraphicLogger(Logger):
         elif mech == "DeferredAcceptance":
             self.log_step_da(data)
         else:
-            self.doc.line("b", "Neznámý mechanismus")
+            self._steps_doc.line("b", "Neznámý mechanismus")
 
     def log_end(self, allocation: Allocation):
         self._allocation = allocation
         doc = self.doc
         doc.line(self._header, "Výsledek přijímaček")
 
-        schools = sorted(list(allocation.accepted.keys()))
+        schools = sorted(list(allocation.accepted.keys()), key=self._school_name)
 
         # accepted
         doc.line(self._subheader, "Přijatí žáci")
@@ -133,7 +237,7 @@ class GraphicLogger(Logger):
                 with doc.tag("tr"):
                     with doc.tag("td", klass="allocation"):
                         doc.line("i", "", klass="bi bi-house-fill")
-                        doc.line("b", f"  {sch}")
+                        doc.line("b", f"  {self._names.school(sch)}")
                         doc.line(
                             "small",
                             f"[ Míst = {self._admission_data.seats[sch]} ]",
@@ -141,7 +245,14 @@ class GraphicLogger(Logger):
                         )
                     with doc.tag("td", klass="allocation green-black"):
                         doc.line("i", "", klass="bi bi-person-fill")
-                        doc.text(", ".join((f"  {st}" for st in sorted(list(sts)))))
+                        doc.text(
+                            ", ".join(
+                                (
+                                    f"  {self._names.student(st)}"
+                                    for st in sorted(list(sts), key=self._student_name)
+                                )
+                            )
+                        )
 
         if allocation.rejected:
             doc.line(self._subheader, "Nepřijatí žáci")
@@ -151,29 +262,37 @@ class GraphicLogger(Logger):
                         doc.line("i", "", klass="bi bi-person-fill")
                         doc.text(
                             ", ".join(
-                                (f"  {st}" for st in sorted(list(allocation.rejected)))
+                                (
+                                    f"  {self._names.student(st)}"
+                                    for st in sorted(
+                                        list(allocation.rejected),
+                                        key=self._student_name,
+                                    )
+                                )
                             )
                         )
 
-        self._num_steps = 0
-        self.at_end_log_start(self._admission_data)
+        if self._is_large:
+            doc.line(self._header, "Vstupní data")
+            doc.line(
+                "p",
+                f"{len(self._admission_data.applications)} žáků, "
+                f"{len(self._admission_data.exams)} škol "
+                "(rozsáhlá data nejsou vypsána celá).",
+            )
+        else:
+            self.at_end_log_start(self._admission_data)
         doc.stag("hr", klass="my-5")
         self.doc.line(self._header, "Průběh algoritmu")
-        # self.at_end_before_steps()
-        for step_data in self._step_data:
-            self.at_end_log_step(step_data)
+        doc.asis(self._steps_doc.getvalue())
+        self._steps_doc = rt.Doc()
 
     def log_step_cermat(self, data: Mapping):
-        doc = self.doc
+        doc = self._steps_doc
 
-        schools = list(self._admission_data.exams.keys())
-        if not hasattr(self, "_prev_removed"):
-            self._prev_removed = {sch: set() for sch in schools}
-        if not hasattr(self, "_prev_accepted"):
-            self._prev_accepted = {sch: set() for sch in schools}
-        max_exam_len = max([len(ex) for ex in self._admission_data.exams.values()])
+        schools = self._layout.schools
+        max_exam_len = self._layout.max_exam_len
 
-        exams = self._admission_data.exams
         seats = self._admission_data.seats
         applications = self._admission_data.applications
         applicants = data["Applicants"]
@@ -219,103 +338,57 @@ class GraphicLogger(Logger):
 
         removed_so_far = {sch: 0 for sch in schools}
         cutoffs = {sch: max_exam_len for sch in schools}
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = exams[sch][i]
-
-                        extra_klass = ""
-                        if st in self._prev_accepted[sch]:
-                            extra_klass = "green-green"
-                        elif st in self._prev_removed[sch]:
-                            removed_so_far[sch] += 1
-                            extra_klass = "red-red"
-                        elif (st, sch) in best_match:
-                            extra_klass = "yellow-yellow"
-                        elif removed_so_far[sch] > max_exam_len:
-                            extra_klass = "gray-gray"
-
-                        if i == seats[sch] + removed_so_far[sch] - 1:
-                            extra_klass += " bottom-border"
-                            removed_so_far[sch] += max_exam_len + 1
-                            cutoffs[sch] = i
-
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+
+        def offers_klass(i, st, sch):
+            extra_klass = ""
+            if st in self._prev_accepted[sch]:
+                extra_klass = "green-green"
+            elif st in self._prev_removed[sch]:
+                removed_so_far[sch] += 1
+                extra_klass = "red-red"
+            elif (st, sch) in best_match:
+                extra_klass = "yellow-yellow"
+            elif removed_so_far[sch] > max_exam_len:
+                extra_klass = "gray-gray"
+
+            if i == seats[sch] + removed_so_far[sch] - 1:
+                extra_klass += " bottom-border"
+                removed_so_far[sch] += max_exam_len + 1
+                cutoffs[sch] = i
+            return extra_klass
+
+        self._exam_table(doc, offers_klass)
 
         doc.line(self._subsubheader, "Přijaté a odmítnuté")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-
-                        extra_klass = ""
-                        if st in accepted[sch]:
-                            extra_klass = "green-green"
-                            for other_sch in applications[st][::-1]:
-                                if other_sch == sch:
-                                    break
-                                self._prev_removed[other_sch].add(st)
-
-                        if st in self._prev_removed[sch]:
-                            extra_klass = "red-red"
-
-                        if i == cutoffs[sch]:
-                            extra_klass += " bottom-border"
-                        elif i > cutoffs[sch]:
-                            extra_klass = "gray-gray"
-
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def accepted_klass(i, st, sch):
+            extra_klass = ""
+            if st in accepted[sch]:
+                extra_klass = "green-green"
+                for other_sch in applications[st][::-1]:
+                    if other_sch == sch:
+                        break
+                    self._prev_removed[other_sch].add(st)
+
+            if st in self._prev_removed[sch]:
+                extra_klass = "red-red"
+
+            if i == cutoffs[sch]:
+                extra_klass += " bottom-border"
+            elif i > cutoffs[sch]:
+                extra_klass = "gray-gray"
+            return extra_klass
+
+        self._exam_table(doc, accepted_klass)
 
         self._prev_accepted = accepted
 
     def log_step_da(self, data: Mapping):
-        doc = self.doc
+        doc = self._steps_doc
 
-        schools = list(self._admission_data.exams.keys())
-        if not hasattr(self, "_prev_rejected"):
-            self._prev_rejected = {sch: set() for sch in schools}
-        max_exam_len = max([len(ex) for ex in self._admission_data.exams.values()])
-        exams = self._admission_data.exams
         applications = self._admission_data.applications
-        students = sorted(list(applications.keys()))
-        max_app_len = max([len(app) for app in applications.values()])
+        chunks = self._layout.student_chunks
+        max_app_len = self._layout.max_app_len
 
         last_positions = data["Position on applications"]
         last_to_compare = data["Students to compare"]
@@ -356,11 +429,6 @@ class GraphicLogger(Logger):
                         doc.line("td", label)
 
         def print_wide_table(extra_klasses):
-            chunks = []
-            i = -1
-            for i in range((len(students) - 1) // 8):
-                chunks.append(students[i * 8 : (i + 1) * 8])
-            chunks.append(students[(i + 1) * 8 :])
             with doc.tag("table", klass=self._table_klass):
                 for j, chunk in enumerate(chunks):
                     is_last_chunk = j == (len(chunks) - 1)
@@ -369,18 +437,21 @@ class GraphicLogger(Logger):
                         for st in chunk:
                             with doc.tag("th"):
                                 doc.line("i", "", klass="bi bi-person-fill")
-                                doc.text(f"  {st}")
+                                doc.text(f"  {self._names.student(st)}")
                         if not is_last_chunk:
                             doc.line("th", "...", klass="no-right-border")
                     for i in range(max_app_len):
                         with doc.tag("tr"):
                             doc.line("td", f"{i + 1}. škola")
                             for st in chunk:
+                                if i >= len(applications[st]):
+                                    doc.line("td", "")
+                                    continue
                                 sch = applications[st][i]
                                 extra_klass = extra_klasses[st][i]
                                 with doc.tag("td", klass=extra_klass):
                                     doc.line("i", "", klass="bi bi-house-fill")
-                                    doc.text(f"  {sch}")
+                                    doc.text(f"  {self._names.school(sch)}")
                             if not is_last_chunk:
                                 doc.line("td", "...", klass="no-right-border")
                     if not is_last_chunk:
@@ -407,7 +478,7 @@ class GraphicLogger(Logger):
         doc.line(self._subsubsubheader, "Podle přihlášek")
 
         extra_klasses = {}
-        for st in students:
+        for st in applications:
             extra_klasses[st] = []
             for i, sch in enumerate(applications[st]):
                 if st in self._prev_rejected[sch]:
@@ -424,44 +495,24 @@ class GraphicLogger(Logger):
 
         doc.line(self._subsubsubheader, "Podle výsledků zkoušky")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        # offered / not-evaluated / last-offered / removed
-                        if st in self._prev_rejected[sch]:
-                            extra_klass = "red-red"
-                        elif sch in last_to_compare and st in last_to_compare[sch]:
-                            extra_klass = "yellow-yellow"
-                        else:
-                            extra_klass = "gray-gray"
-                        # if j == last_positions[st]:
-                        #     extra_klass += " right-border"
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def offers_klass(i, st, sch):
+            # offered / not-evaluated / last-offered / removed
+            if st in self._prev_rejected[sch]:
+                return "red-red"
+            elif sch in last_to_compare and st in last_to_compare[sch]:
+                return "yellow-yellow"
+            else:
+                return "gray-gray"
+            # if j == last_positions[st]:
+            #     extra_klass += " right-border"
+
+        self._exam_table(doc, offers_klass)
 
         doc.line(self._subsubheader, "Přijaté a odmítnuté")
         doc.line(self._subsubsubheader, "Podle přihlášek")
 
         extra_klasses = {}
-        for st in students:
+        for st in applications:
             extra_klasses[st] = []
             for i, sch in enumerate(applications[st]):
                 if (
@@ -486,47 +537,22 @@ class GraphicLogger(Logger):
 
         doc.line(self._subsubsubheader, "Podle výsledků zkoušky")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        # accepted / removed / not-evaluated / last-offered
-                        if st in accepted[sch]:
-                            extra_klass = "green-green"
-                        elif st in self._prev_rejected[sch]:
-                            extra_klass = "red-red"
-                        elif st in all_accepted:
-                            extra_klass = "gray-gray"
-                        else:
-                            extra_klass = ""
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def accepted_klass(i, st, sch):
+            # accepted / removed / not-evaluated / last-offered
+            if st in accepted[sch]:
+                return "green-green"
+            elif st in self._prev_rejected[sch]:
+                return "red-red"
+            elif st in all_accepted:
+                return "gray-gray"
+            else:
+                return ""
+
+        self._exam_table(doc, accepted_klass)
 
     def log_step_school_optimal_sm(self, data: Mapping):
         """ """
-        doc = self.doc
-
-        schools = list(self._admission_data.exams.keys())
-        # if not hasattr(self, "_prev_rejected"):
-        #     self._prev_rejected = {sch: {} for sch in schools}
-        max_exam_len = max([len(ex) for ex in self._admission_data.exams.values()])
+        doc = self._steps_doc
 
         exams = self._admission_data.exams
         remaining_applicants = data["Remaining applicants"]
@@ -572,89 +598,39 @@ class GraphicLogger(Logger):
             sch: len(exams[sch]) - len(sts) for sch, sts in remaining_applicants.items()
         }
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        # offered / not-evaluated / last-offered / removed
-                        if i < above_line[sch]:
-                            extra_klass = (
-                                "yellow-yellow" if sch in offers[st] else "red-red"
-                            )
-                        else:
-                            extra_klass = "gray-gray"
-                        if i == above_line[sch] - 1:
-                            extra_klass += " bottom-border"
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def offers_klass(i, st, sch):
+            # offered / not-evaluated / last-offered / removed
+            if i < above_line[sch]:
+                extra_klass = "yellow-yellow" if sch in offers[st] else "red-red"
+            else:
+                extra_klass = "gray-gray"
+            if i == above_line[sch] - 1:
+                extra_klass += " bottom-border"
+            return extra_klass
+
+        self._exam_table(doc, offers_klass)
 
         doc.line(self._subsubheader, "Přijaté a odmítnuté")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        # accepted / removed / not-evaluated / last-offered
-                        if i < above_line[sch]:
-                            extra_klass = (
-                                "green-green" if st in accepted[sch] else "red-red"
-                            )
-                        else:
-                            extra_klass = "gray-gray"
-                        if i == above_line[sch] - 1:
-                            extra_klass += " bottom-border"
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def accepted_klass(i, st, sch):
+            # accepted / removed / not-evaluated / last-offered
+            if i < above_line[sch]:
+                extra_klass = "green-green" if st in accepted[sch] else "red-red"
+            else:
+                extra_klass = "gray-gray"
+            if i == above_line[sch] - 1:
+                extra_klass += " bottom-border"
+            return extra_klass
 
-    def log_step_naive(self, data: Mapping):
-        doc = self.doc
+        self._exam_table(doc, accepted_klass)
 
-        schools = list(self._admission_data.exams.keys())
-        if not hasattr(self, "_prev_accepted"):
-            self._prev_accepted = {sch: set() for sch in schools}
-        if not hasattr(self, "_prev_removed"):
-            self._prev_removed = {sch: set() for sch in schools}
+    def log_step_naive(self, data: Mapping):
+        doc = self._steps_doc
 
         offers = data["Current offers"]
         accepted = data["Accepted"]
         remaining_seats = data["Remaining seats"]
         all_accepted = {st for sts in accepted.values() for st in sts}
-        max_exam_len = max([len(ex) for ex in self._admission_data.exams.values()])
-        exams = self._admission_data.exams
 
         if self._num_steps == 1:
             color_labels = [
@@ -692,77 +668,109 @@ class GraphicLogger(Logger):
         doc.line(self._subheader, f"Krok {self._num_steps}")
         doc.line(self._subsubheader, "Nabídky")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        if st in self._prev_accepted[sch]:
-                            extra_klass = "green-green"
-                        elif st in self._prev_removed[sch]:
-                            extra_klass = "gray-gray"
-                        elif st in offers and sch in offers[st]:
-                            extra_klass = "yellow-yellow"
-                        else:
-                            extra_klass = "red-red"
-                        # extra_klass = (
-                        #     "yellow-yellow"
-                        #     if st in offers and sch in offers[st]
-                        #     else "red-red"
-                        # )
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def offers_klass(i, st, sch):
+            if st in self._prev_accepted[sch]:
+                return "green-green"
+            elif st in self._prev_removed[sch]:
+                return "gray-gray"
+            elif st in offers and sch in offers[st]:
+                return "yellow-yellow"
+            else:
+                return "red-red"
+
+        self._exam_table(doc, offers_klass)
 
         doc.line(self._subsubheader, "Přijaté a odmítnuté")
 
-        with doc.tag("table", klass=self._table_klass):
-            with doc.tag("tr"):
-                doc.line("th", "")
-                for sch in schools:
-                    with doc.tag("th", klass="exam-school"):
-                        doc.line("i", "", klass="bi bi-house-fill")
-                        doc.text(f"  {sch}")
-                        doc.stag("br")
-                        doc.line(
-                            "small",
-                            f"Míst = {self._admission_data.seats[sch]}",
-                            style="font-weight: normal;",
-                        )
-            for i in range(max_exam_len):
-                with doc.tag("tr"):
-                    doc.line("th", f"{i + 1}.")
-                    for sch in schools:
-                        st = self._admission_data.exams[sch][i]
-                        if st in self._prev_accepted[sch]:
-                            extra_klass = "green-green"
-                        elif st in self._prev_removed[sch]:
-                            extra_klass = "gray-gray"
-                        elif st in accepted[sch]:
-                            extra_klass = "green-green"
-                            self._prev_accepted[sch].add(st)
-                        elif st in all_accepted or not remaining_seats[sch]:
-                            extra_klass = "gray-gray"
-                            self._prev_removed[sch].add(st)
-                        else:
-                            extra_klass = ""
-                        with doc.tag("td", klass=f"exam-student {extra_klass}"):
-                            doc.line("i", "", klass="bi bi-person-fill")
-                            doc.text(
-                                f"  {st} (#{self._application_school_rank[st][sch]})"
-                            )
+        def accepted_klass(i, st, sch):
+            if st in self._prev_accepted[sch]:
+                return "green-green"
+            elif st in self._prev_removed[sch]:
+                return "gray-gray"
+            elif st in accepted[sch]:
+                self._prev_accepted[sch].add(st)
+                return "green-green"
+            elif st in all_accepted or not remaining_seats[sch]:
+                self._prev_removed[sch].add(st)
+                return "gray-gray"
+            else:
+                return ""
+
+        self._exam_table(doc, accepted_klass)
+
+    def _large_value(self, value: Any) -> str:
+        if isinstance(value, (set, frozenset, list, tuple)):
+            return str(len(value))
+        return str(value)
+
+    def _large_items(
+        self, items: List[Any], sign: str, role: Optional[Role], limit: int = 5
+    ) -> str:
+        if role is not None:
+            items = self._names.resolve(list(items), role)
+        names = sorted(str(x) for x in items)
+        more = f" (+{len(names) - limit})" if len(names) > limit else ""
+        return sign + ", ".join(names[:limit]) + more if names else ""
+
+    def _large_change(self, old: Any, new: Any, role: Optional[Role]) -> str:
+        if isinstance(new, (set, frozenset, list, tuple)):
+            old = set(old) if old is not None else set()
+            new = set(new)
+            added = self._large_items(new - old, "+", role)
+            removed = self._large_items(old - new, "−", role)
+            return " ".join(x for x in (added, removed) if x)
+        if old is None:
+            return ""
+        return f"{self._large_value(old)} → {self._large_value(new)}"
+
+    def log_step_large(self, data: Mapping):
+        """
+        Compact step output for large instances: for every mapping in the step data,
+        only the entries changed since the previous step are shown (with the current
+        cutoff of the accepted students at schools), other values only if they changed.
+        """
+        doc = self._steps_doc
+        if self._num_steps == 1:
+            doc.line(
+                "p",
+                "Rozsáhlá data: u každého kroku jsou zobrazeny pouze hodnoty, které se "
+                "oproti předchozímu kroku změnily. U přijatých žáků je uvedena aktuální "
+                "čára (pořadí posledního přijatého žáka ve výsledcích zkoušky).",
+            )
+        doc.stag("hr", klass="my-5")
+        doc.line(self._subheader, f"Krok {self._num_steps}")
+
+        for key, value in data.items():
+            if key == "__name__":
+                continue
+            prev = self._prev_step.get(key)
+            if not isinstance(value, Mapping):
+                if value != prev:
+                    change = self._large_change(prev, value, STEP_ROLES.get(key))
+                    doc.line("p", f"{key}: {change}")
+                continue
+            prev = prev or {}
+            rows = []
+            for k, new in value.items():
+                old = prev.get(k)
+                if old == new:
+                    continue
+                current = self._large_value(new)
+                if key == "Accepted" and new:
+                    ranks = self._exam_ranks[k]
+                    cutoff = max(ranks[st] for st in new if st in ranks) + 1
+                    current += f" (čára {cutoff}.)"
+                role = STEP_ROLES.get(key, "school")
+                name = str(self._names.resolve_id(k, role))
+                other = "school" if role == "student" else "student"
+                rows.append([name, current, self._large_change(old, new, other)])
+            if rows:
+                doc.line(self._subsubheader, f"{key} ({len(rows)} změn)")
+                doc.expandable_table(
+                    ["", "Nyní", "Změna"],
+                    sorted(rows),
+                    visible=self._large_visible_rows,
+                    klass=self._table_klass,
+                    more_label="Zobrazit další",
+                )
+        self._prev_step = data
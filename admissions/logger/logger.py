@@ -1,5 +1,6 @@
-from typing import Dict
+from typing import Dict, Optional
 from admissions.domain import AdmissionData, Allocation
+from admissions.profile import Profile
 
 
 class Logger:
@@ -16,6 +17,19 @@ class Logger:
     def name(self, value):
         self._name = value
 
+    @property
+    def profile(self) -> Optional[Profile]:
+        """Profile of the current run to record into, None disables profiling."""
+        return None
+
+    @property
+    def consumes_steps(self) -> bool:
+        """
+        Whether the logger uses the step data, mechanisms skip building the snapshot
+        of their state for every step otherwise.
+        """
+        return type(self).log_step is not Logger.log_step
+
     def log_start(self, admisison: AdmissionData):
         ...
 
@@ -0,0 +1,52 @@
+from typing import Dict, Optional
+from .logger import Logger
+from ..domain import AdmissionData, Allocation
+from ..profile import Profile
+
+
+class MultiLogger(Logger):
+    """
+    Multi logger class:
+        - forwards every call to all the attached loggers, so several consumers
+          (e.g. a report, timing, a progress indicator) can follow a single run
+        - the step data are shared by the loggers and must not be modified
+        - the first attached logger providing a profile records the timings
+    """
+
+    def __init__(self, *loggers: Logger):
+        super().__init__()
+        self.loggers = list(loggers)
+
+    def attach(self, logger: Logger) -> Logger:
+        logger.name = self.name
+        self.loggers.append(logger)
+        return logger
+
+    @Logger.name.setter
+    def name(self, value):
+        self._name = value
+        for logger in self.loggers:
+            logger.name = value
+
+    @property
+    def profile(self) -> Optional[Profile]:
+        for logger in self.loggers:
+            if logger.profile is not None:
+                return logger.profile
+        return None
+
+    @property
+    def consumes_steps(self) -> bool:
+        return any(logger.consumes_steps for logger in self.loggers)
+
+    def log_start(self, admission_data: AdmissionData):
+        for logger in self.loggers:
+            logger.log_start(admission_data)
+
+    def log_step(self, data: Dict):
+        for logger in self.loggers:
+            logger.log_step(data)
+
+    def log_end(self, allocation: Allocation):
+        for logger in self.loggers:
+            logger.log_end(allocation)
@@ -0,0 +1,48 @@
+from typing import Dict, List, Optional
+from .logger import Logger
+from ..domain import AdmissionData, Allocation
+from ..profile import Profile
+
+
+class TimingLogger(Logger):
+    """
+    Timing logger class:
+        - records a Profile (phase and step wall times, domain counters) of every run
+        - optionally forwards everything to another logger, whose time is then
+          measured as the logging phase
+    """
+
+    def __init__(self, logger: Optional[Logger] = None, verbose: bool = False):
+        super().__init__()
+        self.logger = logger
+        self.verbose = verbose
+        self.profiles: List[Profile] = []
+
+    @Logger.name.setter
+    def name(self, value):
+        self._name = value
+        if self.logger is not None:
+            self.logger.name = value
+
+    @property
+    def profile(self) -> Optional[Profile]:
+        return self.profiles[-1] if self.profiles else None
+
+    @property
+    def consumes_steps(self) -> bool:
+        return self.logger is not None and self.logger.consumes_steps
+
+    def log_start(self, admission_data: AdmissionData):
+        self.profiles.append(Profile(name=self.name))
+        if self.logger is not None:
+            self.logger.log_start(admission_data)
+
+    def log_step(self, data: Dict):
+        if self.logger is not None:
+            self.logger.log_step(data)
+
+    def log_end(self, allocation: Allocation):
+        if self.logger is not None:
+            self.logger.log_end(allocation)
+        if self.verbose:
+            print(self.profile)
@@ -1,17 +1,45 @@
+import os
+import pickle
+import zlib
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, Tuple
+from . import metrics
 from .domain import AdmissionData, Allocation
 from .logger import Logger
+from .profile import Profile
+from .trace import StudentTrace
 
 
 class Mechanism(ABC):
-    def __init__(self, admission_data: AdmissionData, logger: Logger = Logger()):
+    # bump when the results or step logs change without a change in the source code
+    version = 1
+    # attributes holding the whole state of a run in between the steps
+    state_attributes: Tuple[str, ...] = ()
+    # modules the mechanism uses without importing them (e.g. through the data),
+    # their source is a part of the cache key as well
+    source_modules: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        admission_data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
         self.validate_data(admission_data)
         self.admission_data = admission_data
-        self.students = set(self.admission_data.applications.keys())
-        self.schools = set(self.admission_data.exams.keys())
+        self.students = set(self.admission_data.student_set())
+        self.schools = set(self.admission_data.school_set())
         self.logger = logger
         self.logger.name = self.__class__.__name__
+        self.profile: Optional[Profile] = None
+        self.trace = trace
+        self.num_steps = 0
+        self._exam_ranks = None
+        self._checkpoint: Optional[Tuple[str, int]] = None
+        # whether steps return a snapshot of the state, `evaluate` turns it off for
+        # loggers that ignore the step data (then only the name is returned)
+        self.record_steps = True
 
     @property
     def applications(self):
@@ -25,11 +53,125 @@ class Mechanism(ABC):
     def seats(self):
         return self.admission_data.seats
 
+    @property
+    def exam_ranks(self):
+        if self._exam_ranks is None:
+            self._exam_ranks = self.admission_data.exam_ranks()
+        return self._exam_ranks
+
     def validate_data(self, admission_data: AdmissionData):
         """
-        Do some basic sanity checks on input data.
+        Check cross-references of input data before any step is run.
+
+        Raises:
+            InvalidAdmissionData: if the data contain errors (warnings are allowed)
+        """
+        admission_data.validate().raise_for_errors()
+
+    def count(self, **counts: int):
+        """Add counts of domain operations to the profile (no-op without profiling)."""
+        if self.profile is not None:
+            self.profile.counters.update(counts)
+
+    def emit(self, event: str, student, school=None, rank: int = -1, cutoff: int = -1):
+        """Record an event of the student in the current step (no-op without trace)."""
+        if self.trace is not None:
+            self.trace.emit(self.num_steps, event, student, school, rank, cutoff)
+
+    def _trace_allocation(self, allocation: Allocation):
+        # final result of every student, with the final cutoffs of the schools the
+        # student preferred to the result (the last admitted student)
+        admitted = {}
+        cutoffs = {}
+        for sch, sts in allocation.accepted.items():
+            ranks = self.exam_ranks[sch]
+            cutoffs[sch] = max((ranks.get(st, -1) for st in sts), default=-1)
+            for st in sts:
+                admitted[st] = sch
+        for st, schs in self.applications.items():
+            for sch in schs:
+                rank = self.exam_ranks.get(sch, {}).get(st, -1)
+                if sch == admitted.get(st):
+                    self.emit("admitted", st, sch, rank=rank, cutoff=cutoffs[sch])
+                    break
+                self.emit("not_admitted", st, sch, rank, cutoffs.get(sch, -1))
+            else:
+                self.emit("unplaced", st)
+
+    def _step(self) -> Dict[str, Any]:
+        self.num_steps += 1
+        data = self.step()
+        if self._checkpoint is not None and self.num_steps % self._checkpoint[1] == 0:
+            self.save_checkpoint(self._checkpoint[0])
+        return data
+
+    def get_state(self) -> Dict[str, Any]:
+        return {attr: getattr(self, attr) for attr in self.state_attributes}
+
+    def set_state(self, state: Dict[str, Any]):
+        for attr in self.state_attributes:
+            setattr(self, attr, state[attr])
+
+    def _checkpoint_header(self) -> Dict[str, str]:
+        from .cache import mechanism_key
+
+        return {
+            "mechanism": mechanism_key(type(self)),
+            "fingerprint": self.admission_data.fingerprint(),
+        }
+
+    def save_checkpoint(self, path: str):
+        """
+        Write the current state (not the history) of the run to the file, it is
+        replaced atomically, so a crash never leaves a broken checkpoint behind.
+        With a trace attached, the checkpoint holds the events recorded so far as
+        well, so its size grows with the run then.
+        """
+        checkpoint = {
+            **self._checkpoint_header(),
+            "num_steps": self.num_steps,
+            "state": self.get_state(),
+            "trace": None if self.trace is None else self.trace.get_state(),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(checkpoint, pickle.HIGHEST_PROTOCOL)))
+        os.replace(tmp_path, path)
+
+    def restore_checkpoint(self, path: str):
+        """
+        Continue the run from the checkpoint, `evaluate` (or `iter_steps`) then
+        finishes it with the identical allocation. An attached trace is replaced by
+        the events saved in the checkpoint, so it gets the complete history.
+
+        Raises:
+            ValueError: if the checkpoint is from another mechanism (or its version)
+                or from other data, or if a trace is attached, but the checkpoint
+                was saved without one
+        """
+        with open(path, "rb") as f:
+            checkpoint = pickle.loads(zlib.decompress(f.read()))
+        for key, value in self._checkpoint_header().items():
+            if checkpoint[key] != value:
+                raise ValueError(f"Checkpoint {path} does not match the {key}")
+        if self.trace is not None and checkpoint["trace"] is None:
+            raise ValueError(f"Checkpoint {path} has no trace to continue")
+        self.num_steps = checkpoint["num_steps"]
+        self.set_state(checkpoint["state"])
+        if self.trace is not None:
+            self.trace.set_state(checkpoint["trace"])
+
+    def checkpoint(self, path: str, every: int = 1) -> "Mechanism":
+        """
+        Save a checkpoint every `every` steps during the run, resume from the file
+        if it already exists:
+
+            allocation = DeferredAcceptance(data).checkpoint("run.ckpt", 50).evaluate()
         """
-        ...
+        if os.path.exists(path):
+            self.restore_checkpoint(path)
+        self._checkpoint = (path, every)
+        return self
 
     @abstractmethod
     def is_done(self) -> bool:
@@ -43,12 +185,68 @@ class Mechanism(ABC):
     def allocate(self) -> Allocation:
         raise NotImplementedError
 
+    def iter_steps(self) -> Iterator[Dict[str, Any]]:
+        """
+        Run the mechanism lazily, yielding the data of every step as it is computed.
+        The run can be paused (stop iterating), resumed (continue with the same
+        iterator) or abandoned; nothing is kept in between, so memory does not grow
+        with the number of steps. The allocation is available through `allocate`
+        once the iterator is exhausted:
+
+            for data in mechanism.iter_steps():
+                progress.update()
+            allocation = mechanism.allocate()
+        """
+        while not self.is_done():
+            yield self._step()
+
     def evaluate(self) -> Allocation:
+        self.record_steps = self.logger.consumes_steps
         self.logger.log_start(self.admission_data)
-        while not self.is_done():
-            logging_data = self.step()
+        self.profile = self.logger.profile
+        registry = metrics.active_registry()
+        if registry is not None and self.profile is None:
+            self.profile = Profile(name=self.__class__.__name__)
+        if self.profile is not None:
+            allocation = self._evaluate_profiled(self.profile)
+            if registry is not None:
+                registry.observe_profile(self.profile)
+            return allocation
+
+        for logging_data in self.iter_steps():
+            self.logger.log_step(logging_data)
+
+        allocation = self.allocate()
+        allocation.names = self.admission_data.names
+        if self.trace is not None:
+            self._trace_allocation(allocation)
+        self.logger.log_end(allocation)
+        return allocation
+
+    def _evaluate_profiled(self, profile: Profile) -> Allocation:
+        # the same as evaluate, with every phase timed
+        while True:
+            t0 = perf_counter()
+            is_done = self.is_done()
+            t1 = perf_counter()
+            profile.add("is_done", t1 - t0)
+            if is_done:
+                break
+            logging_data = self._step()
+            t2 = perf_counter()
             self.logger.log_step(logging_data)
+            t3 = perf_counter()
+            profile.steps.append(t2 - t1)
+            profile.add("step", t2 - t1)
+            profile.add("logging", t3 - t2)
 
+        t0 = perf_counter()
         allocation = self.allocate()
+        allocation.names = self.admission_data.names
+        if self.trace is not None:
+            self._trace_allocation(allocation)
+        t1 = perf_counter()
         self.logger.log_end(allocation)
+        profile.add("allocate", t1 - t0)
+        profile.add("logging", perf_counter() - t1)
         return allocation
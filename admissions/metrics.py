@@ -0,0 +1,214 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from .profile import Profile
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Labels]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters (monotonic totals) and gauges (current values),
+    both optionally labelled:
+
+        registry.inc("admissions_runs_total", mechanism="DeferredAcceptance")
+        registry.set("admissions_simulation_queue_depth", 12)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Sample, float] = {}
+        self.gauges: Dict[Sample, float] = {}
+
+    @staticmethod
+    def _sample(name: str, labels: Dict[str, str]) -> Sample:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        sample = self._sample(name, labels)
+        with self._lock:
+            self.counters[sample] = self.counters.get(sample, 0) + value
+
+    def set(self, name: str, value: float, **labels: str):
+        with self._lock:
+            self.gauges[self._sample(name, labels)] = value
+
+    def add(self, name: str, value: float, **labels: str):
+        """Change a gauge by the value (e.g. depth of a queue)."""
+        sample = self._sample(name, labels)
+        with self._lock:
+            self.gauges[sample] = self.gauges.get(sample, 0) + value
+
+    def observe_profile(self, profile: Profile):
+        """Add timings and domain counters of a finished mechanism run."""
+        labels = {"mechanism": profile.name}
+        self.inc("admissions_runs_total", **labels)
+        self.inc("admissions_steps_total", profile.num_steps, **labels)
+        for phase, seconds in profile.phases.items():
+            self.inc("admissions_seconds_total", seconds, phase=phase, **labels)
+        for key, n in profile.counters.items():
+            self.inc(f"admissions_{key}_total", n, **labels)
+
+    def snapshot(self) -> Tuple[Dict[Sample, float], Dict[Sample, float]]:
+        with self._lock:
+            return dict(self.counters), dict(self.gauges)
+
+
+def _format_sample(sample: Sample) -> str:
+    name, labels = sample
+    if not labels:
+        return name
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def to_prometheus(registry: MetricsRegistry) -> str:
+    """Prometheus text exposition format (e.g. for the textfile collector)."""
+    counters, gauges = registry.snapshot()
+    lines = []
+    for kind, samples in (("counter", counters), ("gauge", gauges)):
+        typed = set()
+        for sample, value in sorted(samples.items()):
+            if sample[0] not in typed:
+                typed.add(sample[0])
+                lines.append(f"# TYPE {sample[0]} {kind}")
+            lines.append(f"{_format_sample(sample)} {value!r}")
+    return "\n".join(lines) + "\n"
+
+
+def max_rss_bytes() -> Dict[str, int]:
+    """Peak resident memory of this process and of its finished children."""
+    if resource is None:
+        return {}
+    # kilobytes on Linux, bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+class MetricsExporter:
+    """
+    Background thread writing the registry to a local file every `interval` seconds
+    and once more when stopped:
+        - `prometheus`: the file is atomically replaced by the current values
+        - `jsonl`: a line with the time, all the values and rates of counters per
+          second since the previous line is appended (so it can be followed by tail)
+    The format is derived from the file suffix (.jsonl or anything else) by default.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: str,
+        interval: float = 10.0,
+        fmt: Optional[str] = None,
+    ):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt or ("jsonl" if path.endswith(".jsonl") else "prometheus")
+        if self.fmt not in ("prometheus", "jsonl"):
+            raise ValueError(f"Unknown metrics format: {self.fmt}")
+        self._stop = threading.Event()
+        self._thread = None
+        self._last: Optional[Tuple[float, Dict[Sample, float]]] = None
+
+    def export(self):
+        for process, value in max_rss_bytes().items():
+            self.registry.set("admissions_max_rss_bytes", value, process=process)
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        if self.fmt == "prometheus":
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(to_prometheus(self.registry))
+            os.replace(tmp, self.path)
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(self._record()) + "\n")
+
+    def _record(self) -> Dict:
+        now = time.time()
+        counters, gauges = self.registry.snapshot()
+        record = {
+            "time": now,
+            "counters": {_format_sample(s): v for s, v in counters.items()},
+            "gauges": {_format_sample(s): v for s, v in gauges.items()},
+        }
+        if self._last is not None:
+            last_time, last_counters = self._last
+            elapsed = max(now - last_time, 1e-9)
+            record["rates"] = {
+                _format_sample(s): (v - last_counters.get(s, 0)) / elapsed
+                for s, v in counters.items()
+            }
+        self._last = (now, counters)
+        return record
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def start(self) -> MetricsExporter:
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-exporter", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.export()
+
+
+_active: Optional[MetricsRegistry] = None
+
+
+def active_registry() -> Optional[MetricsRegistry]:
+    """Registry fed by mechanisms and simulations, None when metrics are off."""
+    return _active
+
+
+@contextmanager
+def collect(
+    path: Optional[str] = None,
+    interval: float = 10.0,
+    fmt: Optional[str] = None,
+    registry: Optional[MetricsRegistry] = None,
+) -> Iterator[MetricsRegistry]:
+    """
+    Turn on metrics for the block, optionally exporting them to a local file:
+
+        with metrics.collect("out/metrics.prom", interval=5):
+            run_simulations(instances, mechanisms)
+    """
+    global _active
+    registry = registry if registry is not None else MetricsRegistry()
+    previous, _active = _active, registry
+    exporter = MetricsExporter(registry, path, interval, fmt).start() if path else None
+    try:
+        yield registry
+    finally:
+        _active = previous
+        if exporter is not None:
+            exporter.stop()
@@ -1,7 +1,9 @@
 from copy import deepcopy
+from typing import Optional
 from .domain import AdmissionData, Allocation
 from .mechanism import Mechanism
 from .logger import Logger
+from .trace import StudentTrace
 
 
 class NaiveMechanism(Mechanism):
@@ -28,8 +30,15 @@ class NaiveMechanism(Mechanism):
        se vše opakuje od kroku 1.
     """
 
-    def __init__(self, data: AdmissionData, logger: Logger = Logger()):
-        super().__init__(data, logger=logger)
+    state_attributes = ("accepted", "remaining_seats", "remaining_applicants")
+
+    def __init__(
+        self,
+        data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
+        super().__init__(data, logger=logger, trace=trace)
         self.accepted = {sch: set() for sch in self.schools}
         self.remaining_seats = {sch: n for sch, n in self.seats.items()}
         self.remaining_applicants = {
@@ -52,6 +61,11 @@ class NaiveMechanism(Mechanism):
                     offers[st].append(school)
                 else:
                     offers[st] = [school]
+        self.count(
+            offers=sum(len(offs) for offs in offers.values()), acceptances=len(offers)
+        )
+        if self.trace is not None:
+            self._trace_offers(offers)
         # 2. prijmi na nejlepsi offer a odstran z remaining_applicants
         for st, offs in offers.items():
             for sch in self.applications[st]:
@@ -77,6 +91,23 @@ class NaiveMechanism(Mechanism):
             }
         )
 
+    def _trace_offers(self, offers):
+        # the last student with an offer is the cutoff
+        cutoffs = {}
+        for sch, applicants in self.remaining_applicants.items():
+            above = applicants[: self.remaining_seats[sch]]
+            cutoffs[sch] = self.exam_ranks[sch][above[-1]] if above else -1
+        for st, offs in offers.items():
+            best = next(sch for sch in self.applications[st] if sch in offs)
+            # in the order of the application, so that the trace is deterministic
+            for sch in self.applications[st]:
+                if sch not in offs:
+                    continue
+                rank = self.exam_ranks[sch][st]
+                self.emit("offered", st, sch, rank=rank, cutoff=cutoffs[sch])
+                event = "held" if sch == best else "declined"
+                self.emit(event, st, sch, rank=rank, cutoff=cutoffs[sch])
+
     def allocate(self) -> Allocation:
         accepted = {sch: frozenset(sts) for sch, sts in self.accepted.items()}
         all_accepted = {st for sts in self.accepted.values() for st in sts}
@@ -0,0 +1,54 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+# phases of Mechanism.evaluate
+PHASES = ("is_done", "step", "allocate", "logging")
+
+
+@dataclass
+class Profile:
+    """
+    Wall times and domain counters of a single mechanism run:
+        - `phases`: total seconds spent in every phase of `Mechanism.evaluate`
+        - `steps`: seconds of every single `step()` call
+        - `counters`: domain operations (proposals, rejections, strike-offs, ...)
+    """
+
+    name: str = ""
+    phases: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    steps: List[float] = field(default_factory=list)
+    counters: Counter = field(default_factory=Counter)
+
+    @property
+    def num_steps(self) -> int:
+        return len(self.steps)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "total": self.total,
+            "num_steps": self.num_steps,
+            "phases": dict(self.phases),
+            "steps": list(self.steps),
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self):
+        lines = [f"{self.name}: {self.total:.6f} s in {self.num_steps} steps"]
+        total = self.total or 1.0
+        for phase, seconds in self.phases.items():
+            lines.append(f"  {phase:<10}{seconds:>12.6f} s {seconds / total:>7.1%}")
+        if self.steps:
+            slowest = max(range(len(self.steps)), key=self.steps.__getitem__)
+            lines.append(f"  slowest step {slowest + 1}: {self.steps[slowest]:.6f} s")
+        for key, n in self.counters.items():
+            lines.append(f"  {key:<10}{n:>12}")
+        return "\n".join(lines)
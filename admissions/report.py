@@ -0,0 +1,177 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Mapping, Optional, Sequence, Type
+from . import reportree as rt
+from .cache import ResultCache, mechanism_key
+from .domain import AdmissionData
+from .logger import GraphicLogger
+from .mechanism import Mechanism
+
+Example = Callable[[], AdmissionData]
+
+
+def example_label(example: Example) -> str:
+    """The title of the example is the first line of its docstring."""
+    return example.__doc__.split("\n")[1] if example.__doc__ is not None else ""
+
+
+def render_page(
+    example: Example,
+    mechanism: Type[Mechanism],
+    cache_path: Optional[str] = None,
+) -> str:
+    """
+    HTML fragment of a single page of the report: description of the example and
+    the mechanism, followed by the full output of GraphicLogger.
+    """
+    cache = ResultCache(path=cache_path)
+    logger = GraphicLogger()
+    logger.doc.md(textwrap.dedent(example.__doc__ or ""))
+    logger.doc.md(textwrap.dedent(mechanism.__doc__))
+    cache.evaluate(mechanism, example().freeze(), logger=logger)
+    return logger.doc.getvalue()
+
+
+# modules and assets that determine how a page looks
+_TEMPLATE_MODULES = (
+    "admissions.report",
+    "admissions.logger.logger",
+    "admissions.logger.full_loggers",
+    "admissions.reportree.doc",
+)
+_template_hash: Optional[str] = None
+
+
+def template_hash() -> str:
+    global _template_hash
+    if _template_hash is None:
+        sha = hashlib.sha256()
+        for module in _TEMPLATE_MODULES:
+            sha.update(inspect.getsource(importlib.import_module(module)).encode())
+        sha.update(rt.Doc.get_show_more_javascript().encode())
+        _template_hash = sha.hexdigest()
+    return _template_hash
+
+
+def page_key(example: Example, mechanism: Type[Mechanism]) -> str:
+    """
+    Hash of everything a page is rendered from: content and names of the data,
+    description of the example, the mechanism (see `mechanism_key`) and the template.
+    """
+    data = example()
+    names = json.dumps(
+        [list(data.names.students.items()), list(data.names.schools.items())],
+        ensure_ascii=False,
+        default=repr,
+    )
+    parts = [
+        data.fingerprint(),
+        names,
+        example.__doc__ or "",
+        mechanism_key(mechanism),
+        template_hash(),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    On-disk cache of rendered pages (HTML fragments) keyed by `page_key`, so that
+    a rebuild of the report renders only the pages whose inputs changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".html")
+
+    def get(self, key: str) -> Optional[str]:
+        file = self._file(key)
+        if not os.path.exists(file):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(file, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, key: str, html: str):
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp_file = f"{file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_file, file)
+
+
+def _fragment(html: str) -> rt.Doc:
+    doc = rt.Doc()
+    doc.asis(html)
+    return doc
+
+
+def build_switcher(
+    examples: Sequence[Example],
+    mechanisms: Mapping[str, Type[Mechanism]],
+    jobs: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    page_cache: Optional[PageCache] = None,
+) -> rt.Switcher:
+    """
+    Render the `examples x mechanisms` pages of the report, every page in a separate
+    worker process (examples and mechanisms have to be picklable, i.e. defined at
+    a module level), and assemble them into a Switcher in the given order.
+
+    Args:
+        jobs: Number of worker processes, all the cpus by default, 1 renders the pages
+            in the current process.
+        cache_path: Directory of the ResultCache shared by the workers.
+        page_cache: Cache of the rendered pages, only the changed pages are rendered.
+    """
+    cells = [
+        (example, mechanism)
+        for example in examples
+        for mechanism in mechanisms.values()
+    ]
+    labels = [
+        (example_label(example), mech_label)
+        for example in examples
+        for mech_label in mechanisms
+    ]
+    pages: Dict[int, str] = {}
+    keys = {}
+    if page_cache is not None:
+        for i, (example, mechanism) in enumerate(cells):
+            keys[i] = page_key(example, mechanism)
+            html = page_cache.get(keys[i])
+            if html is not None:
+                pages[i] = html
+    todo = [i for i in range(len(cells)) if i not in pages]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(todo) <= 1:
+        for i in todo:
+            example, mechanism = cells[i]
+            pages[i] = render_page(example, mechanism, cache_path)
+    else:
+        with ProcessPoolExecutor(min(jobs, len(todo))) as executor:
+            futures = {
+                i: executor.submit(render_page, *cells[i], cache_path) for i in todo
+            }
+            for i, future in futures.items():
+                pages[i] = future.result()
+    if page_cache is not None:
+        for i in todo:
+            page_cache.put(keys[i], pages[i])
+
+    sw = rt.Switcher()
+    for i, (ex_label, mech_label) in enumerate(labels):
+        sw[ex_label][mech_label] = _fragment(pages[i])
+    return sw
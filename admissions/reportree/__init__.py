@@ -1 +1,14 @@
-from .doc import Doc, Switcher
+from typing import TYPE_CHECKING
+from .lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from .doc import Doc, Switcher
+
+# Doc and Switcher import matplotlib, pandas and seaborn, only on the first access
+__getattr__, __dir__ = lazy_attributes(
+    globals(),
+    {
+        "Doc": ".doc",
+        "Switcher": ".doc",
+    },
+)
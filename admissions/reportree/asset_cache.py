@@ -0,0 +1,101 @@
+"""
+Process-wide cache of the assets embedded into every page (compiled stylesheet,
+base64 encoded images, javascript), optionally backed by a directory so that the
+assets are reused across sessions as well. Entries are keyed by the content of
+the source and all parameters, so a changed source is never served from the cache.
+"""
+
+import base64
+import hashlib
+import io
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+_assets_dir = os.path.join(os.path.dirname(__file__), "assets")
+_sources: Dict[str, Tuple[int, bytes]] = {}
+_memory: Dict[str, str] = {}
+_cache_dir: Optional[str] = os.environ.get("REPORTREE_CACHE_DIR")
+
+
+def set_cache_dir(path: Optional[str]):
+    """Directory of the on-disk tier, None keeps the assets in memory only."""
+    global _cache_dir
+    _cache_dir = path
+
+
+def clear():
+    """Drop the in-memory tier (the on-disk one is kept)."""
+    _sources.clear()
+    _memory.clear()
+
+
+def read_source(path: str) -> bytes:
+    """Content of the file, read again only when the file is modified."""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _sources.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, f.read())
+        _sources[path] = cached
+    return cached[1]
+
+
+def cached(kind: str, source: bytes, params: str, compute: Callable[[], str]) -> str:
+    key = hashlib.sha256(
+        kind.encode() + b"\0" + params.encode() + b"\0" + source
+    ).hexdigest()
+    if key in _memory:
+        return _memory[key]
+    file = os.path.join(_cache_dir, kind, key) if _cache_dir else None
+    if file is not None and os.path.exists(file):
+        with open(file, "r", encoding="utf-8") as f:
+            value = f.read()
+    else:
+        value = compute()
+        if file is not None:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            tmp_file = f"{file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_file, file)
+    _memory[key] = value
+    return value
+
+
+def asset_text(name: str) -> str:
+    """Text of a packaged asset (e.g. `switcher.js`)."""
+    return read_source(os.path.join(_assets_dir, name)).decode("utf-8")
+
+
+def compiled_css(max_width: int = 1900) -> str:
+    """`style.scss` compiled with the given maximal width of the page."""
+    import sass
+
+    source = asset_text("style.scss")
+
+    def compute():
+        sass_content = f"""
+        $max_width: {max_width}px;
+
+        {source}
+        """
+        return sass.compile(string=sass_content)
+
+    params = f"max_width={max_width};sass={sass.__version__}"
+    return cached("css", source.encode("utf-8"), params, compute)
+
+
+def image_b64(image_file: str) -> str:
+    """Image re-encoded in its own format (by the suffix) as a base64 string."""
+    from PIL import Image
+
+    format = image_file.split(".")[-1]
+
+    def compute():
+        with Image.open(image_file) as img:
+            buffered = io.BytesIO()
+            img.save(buffered, format=format)
+            img_bytes = buffered.getvalue()
+        return base64.b64encode(img_bytes).decode()
+
+    return cached("image", read_source(image_file), f"format={format}", compute)
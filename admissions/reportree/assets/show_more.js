@@ -0,0 +1,20 @@
+// This code renders the collapsed rows of Doc.expandable_table on demand
+
+async function showMoreRows(button) {
+  // rows are deflated and base64 encoded JSON: [[cell, cell, ...], ...]
+  var bytes = Uint8Array.from(atob(button.dataset.rows), function (c) {
+    return c.charCodeAt(0);
+  });
+  var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+  var rows = JSON.parse(await new Response(stream).text());
+  var body = button.previousElementSibling.tBodies[0];
+  for (var i = 0; i < rows.length; i++) {
+    var tr = body.insertRow();
+    for (var j = 0; j < rows[i].length; j++) {
+      var cell = document.createElement(j === 0 ? "th" : "td");
+      cell.textContent = rows[i][j];
+      tr.appendChild(cell);
+    }
+  }
+  button.remove();
+}
@@ -0,0 +1,30 @@
+// This code loads the lazily included pages of Switcher when they are shown first
+
+function switcherFragment(contentId, html) {
+  var content = document.getElementById(contentId);
+  content.innerHTML = html;
+  // scripts inserted through innerHTML are not executed, replace them by new ones
+  var scripts = content.querySelectorAll("script");
+  for (var i = 0; i < scripts.length; i++) {
+    var script = document.createElement("script");
+    script.text = scripts[i].text;
+    scripts[i].replaceWith(script);
+  }
+}
+
+function loadContent(content) {
+  // pages are loaded through script tags, so that it works without a server as well
+  if (!content.dataset.src || content.dataset.loaded) {
+    return;
+  }
+  content.dataset.loaded = "true";
+  var script = document.createElement("script");
+  script.src = content.dataset.src;
+  document.head.appendChild(script);
+}
+
+var showContentEagerly = showContentAndParents;
+showContentAndParents = function (contentId) {
+  loadContent(document.getElementById(contentId));
+  showContentEagerly(contentId);
+};
@@ -3,11 +3,10 @@ import os
 import io
 import importlib
 import base64
-from PIL import Image
+import zlib
 import json
-from typing import Optional, Callable
+from typing import Dict, Optional, Callable, Sequence
 import yattag as yt
-import sass
 import markdown
 import numpy as np
 import pandas as pd
@@ -15,6 +14,7 @@ import matplotlib as mpl
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 import seaborn as sns
+from . import asset_cache
 from .generic_tree import GenericTree
 from .html_parts import css_base, js_doc_tree_script
 from .io import LocalWriter, IWriter
@@ -33,17 +33,16 @@ def _idx_str(idx):
 class Switcher(GenericTree):
     """A tree of Docs. Provides the button and javascript to switch between the leaf pages."""
 
-    _javascript = None
+    # directory (relative to the page) of the lazily loaded leaf pages
+    _fragments_dir = "pages"
 
     @classmethod
     def get_javascript(cls):
-        # TODO: turn into a proper package asset later
-        if cls._javascript is None:
-            with open(
-                os.path.join(os.path.dirname(__file__), "assets", "switcher.js"), "r"
-            ) as file:
-                cls._javascript = file.read()
-        return cls._javascript
+        return asset_cache.asset_text("switcher.js")
+
+    @classmethod
+    def get_lazy_javascript(cls):
+        return asset_cache.asset_text("switcher_lazy.js")
 
     def collector(self, f_node, f_leaf, _idx=()):
         if self.is_leaf():
@@ -75,37 +74,51 @@ class Switcher(GenericTree):
 
         return self.collector(hierarchy_f_node, hierarchy_f_leaf)
 
-    def to_buttons(self):
-        def buttons_f_leaf(v, _):
-            doc = Doc()
+    def to_buttons(self, fragments: Optional[Dict[str, str]] = None) -> Doc:
+        """Buttons and pages of the whole tree, written into a single Doc.
+
+        Args:
+            fragments: If given, the leaf pages are not included in the Doc. Every leaf
+                is stored there as a script (keyed by its relative path) that fills
+                the page in when it is shown for the first time.
+        """
+        doc = Doc()
+        self._write_buttons(doc, (), fragments)
+        return doc
+
+    def _write_buttons(self, doc: Doc, idx, fragments: Optional[Dict[str, str]]):
+        if self.is_leaf():
             doc.line("div", "", klass="my-2")
-            doc.asis(v.getvalue())
-            return doc
-
-        def buttons_f_node(n, idx, children):
-            doc = Doc()
-            with doc.tag("div", klass="row"):
-                with doc.tag("div", klass="btn-group switcher", role="group"):
-                    for i, k in enumerate(n.keys()):
-                        doc.line(
-                            "button",
-                            k,
-                            type="button",
-                            id="btn" + _idx_str(idx) + "_" + str(i + 1),
-                        )
-            for i, (k, v) in enumerate(zip(n.keys(), children)):
-                with doc.tag(
-                    "div", id="page" + _idx_str(idx) + "_" + str(i + 1), klass="content"
-                ):
+            doc.asis(self.get_value().getvalue())
+            return
+
+        with doc.tag("div", klass="row"):
+            with doc.tag("div", klass="btn-group switcher", role="group"):
+                for i, k in enumerate(self.keys()):
+                    doc.line(
+                        "button",
+                        k,
+                        type="button",
+                        id="btn" + _idx_str(idx) + "_" + str(i + 1),
+                    )
+        for i, child in enumerate(self.values()):
+            page_id = "page" + _idx_str((*idx, i))
+            if fragments is not None and child.is_leaf():
+                src = f"{self._fragments_dir}/{page_id}.js"
+                page = Doc()
+                child._write_buttons(page, (*idx, i), None)
+                fragments[src] = (
+                    f"switcherFragment({json.dumps(page_id)}, "
+                    f"{json.dumps(page.getvalue(), ensure_ascii=False)});\n"
+                )
+                doc.line("div", "", ("data-src", src), id=page_id, klass="content")
+            else:
+                with doc.tag("div", id=page_id, klass="content"):
                     # doc.line("h" + str(min(4, len(idx) + 2)), k)
-                    doc.asis(v.getvalue())
-            return doc
-
-        return self.collector(buttons_f_node, buttons_f_leaf)
+                    child._write_buttons(doc, (*idx, i), fragments)
 
 
 class Doc(yt.Doc):
-    _base_style = None
     _cdn = [
         # bootstrap icons
         "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.8.1/font/bootstrap-icons.css",
@@ -121,24 +134,14 @@ class Doc(yt.Doc):
 
     @classmethod
     def get_base_style(cls):
-        # TODO: turn into a proper package asset later
-        if cls._base_style is None:
-            with open(
-                os.path.join(os.path.dirname(__file__), "assets", "style.scss"), "r"
-            ) as file:
-                cls._base_style = file.read()
-        return cls._base_style
+        return asset_cache.asset_text("style.scss")
 
     @classmethod
     def default_head(cls, title: str = "ReporTree Doc") -> yt.Doc:
         # TODO: max-width has to be handled differently in bootstrap world - leave it up to container class?
         kwargs = {}
-        sass_content = f"""
-        $max_width: {kwargs.pop("max_width") if "max_width" in kwargs else 1900}px;
-
-        {Doc.get_base_style()}
-        """
-        css_style = sass.compile(string=sass_content)
+        # compiled once per process (and per cache directory, if set)
+        css_style = asset_cache.compiled_css(kwargs.pop("max_width", 1900))
         doc = yt.Doc()
         with doc.tag("head"):
             doc.stag("meta", charset="utf-8")
@@ -167,6 +170,9 @@ class Doc(yt.Doc):
             self._wrap_kwargs["title"] = kwargs.pop("title")
         super().__init__(*args, **kwargs)
         self._has_switcher = False
+        self._has_show_more = False
+        # lazily loaded pages of the switcher, written next to the page on save
+        self._fragments: Dict[str, str] = {}
 
     def wrap_to_page(self, head_doc: Optional[yt.Doc] = None, **kwargs):
         """Wrap the content of the document into a full HTML page.
@@ -213,12 +219,7 @@ class Doc(yt.Doc):
 
     def image_as_b64(self, image_file: str, **kwargs):
         format = image_file.split(".")[-1]
-        with Image.open(image_file) as img:
-            buffered = io.BytesIO()
-            img.save(buffered, format=format)
-            img_bytes = buffered.getvalue()
-        base64_encoded = base64.b64encode(img_bytes)
-        base64_string = base64_encoded.decode()
+        base64_string = asset_cache.image_b64(image_file)
         self.stag(
             "image",
             src=f"data:image/{format};base64,{base64_string}",
@@ -226,13 +227,16 @@ class Doc(yt.Doc):
         )
         return self
 
-    def switcher(self, switch: Switcher):
+    def switcher(self, switch: Switcher, lazy: bool = False):
+        """Add the switcher with its pages. Lazy pages are saved as separate files next
+        to the document and loaded only when shown, so the initial page stays small.
+        """
         if self._has_switcher:
             raise ValueError("Only one switcher is allowed per document.")
 
         self._has_switcher = True
         self.line("div", "", klass="my-2")
-        self.asis(switch.to_buttons().getvalue())
+        self.asis(switch.to_buttons(self._fragments if lazy else None).getvalue())
         hierarchy = (
             json.dumps(switch.to_hierarchy(), indent=2)
             .replace('  "', "  ")
@@ -242,6 +246,9 @@ class Doc(yt.Doc):
             self.asis("\n")
             self.asis("var buttonHierarchy = " + hierarchy + ";")
             self.asis("\n")
+            if lazy:
+                self.asis(Switcher.get_lazy_javascript())
+                self.asis("\n")
             self.asis(Switcher.get_javascript())
             self.asis("\n")
 
@@ -319,6 +326,55 @@ class Doc(yt.Doc):
 
         return self
 
+    @classmethod
+    def get_show_more_javascript(cls):
+        return asset_cache.asset_text("show_more.js")
+
+    def expandable_table(
+        self,
+        header: Sequence[str],
+        rows: Sequence[Sequence[str]],
+        visible: int = 20,
+        klass: Optional[str] = None,
+        more_label: str = "Show more",
+    ):
+        """Table of text cells (the first one is a row header) with only `visible` rows
+        in the HTML. The other rows are embedded as compressed JSON and rendered in
+        the browser on demand, so large tables stay small until they are expanded.
+        """
+        if not self._has_show_more:
+            self._has_show_more = True
+            with self.tag("script"):
+                self.asis("\n")
+                self.asis(Doc.get_show_more_javascript())
+                self.asis("\n")
+
+        table_kwargs = {"klass": klass} if klass is not None else {}
+        with self.tag("table", **table_kwargs):
+            with self.tag("thead"):
+                with self.tag("tr"):
+                    for h in header:
+                        self.line("th", h)
+            with self.tag("tbody"):
+                for row in rows[:visible]:
+                    with self.tag("tr"):
+                        self.line("th", row[0])
+                        for cell in row[1:]:
+                            self.line("td", cell)
+        hidden = rows[visible:]
+        if hidden:
+            payload = zlib.compress(
+                json.dumps([list(row) for row in hidden], ensure_ascii=False).encode()
+            )
+            self.line(
+                "button",
+                f"{more_label} ({len(hidden)})",
+                ("data-rows", base64.b64encode(payload).decode()),
+                klass="switcher-button",
+                onclick="showMoreRows(this)",
+            )
+        return self
+
     def save(
         self,
         path: str,
@@ -337,4 +393,6 @@ class Doc(yt.Doc):
 
         content = yt.indent(value)
         writer.write_text(os.path.join(path, entry), content)
+        for fragment, text in self._fragments.items():
+            writer.write_text(os.path.join(path, fragment), text)
         return os.path.join(path, entry)
@@ -0,0 +1,25 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_attributes(
+    namespace: Dict[str, Any], lazy: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Module `__getattr__` and `__dir__` for the module with the given globals. An
+    attribute listed in `lazy` (name -> relative module) is imported on its first
+    access and kept in the module then.
+    """
+    module = namespace["__name__"]
+
+    def __getattr__(name: str) -> Any:
+        if name in lazy:
+            value = getattr(importlib.import_module(lazy[name], module), name)
+            namespace[name] = value
+            return value
+        raise AttributeError(f"module {module!r} has no attribute {name!r}")
+
+    def __dir__() -> List[str]:
+        return sorted(list(namespace) + list(lazy))
+
+    return __getattr__, __dir__
@@ -1,9 +1,10 @@
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional
 from copy import deepcopy
 from collections import defaultdict
 from .domain import AdmissionData, Allocation
 from .mechanism import Mechanism
 from .logger import Logger
+from .trace import StudentTrace
 
 
 class SchoolOptimalSM(Mechanism):
@@ -38,54 +39,99 @@ class SchoolOptimalSM(Mechanism):
     a vyškrtnutí jsou pouze ze škol, kde oni sami odmítnuli přijetí (a bylo jim nabídnuto).
     """
 
-    def __init__(self, data: AdmissionData, logger: Logger = Logger()):
-        super().__init__(data, logger=logger)
+    state_attributes = (
+        "accepted",
+        "remaining_seats",
+        "exam_positions",
+        "best_offer",
+        "_active",
+    )
+
+    def __init__(
+        self,
+        data: AdmissionData,
+        logger: Logger = Logger(),
+        trace: Optional[StudentTrace] = None,
+    ):
+        super().__init__(data, logger=logger, trace=trace)
         self.accepted = {sch: set() for sch in self.schools}
         self.remaining_seats = {sch: n for sch, n in self.seats.items()}
-        self.remaining_applicants = {
-            sch: [st for st in sts] for sch, sts in self.exams.items()
+        # position of the first remaining applicant in the exam results of the school
+        self.exam_positions = {sch: 0 for sch in self.exams}
+        # the school every student conditionally accepted (the best offer so far)
+        self.best_offer: Dict[Any, Any] = {}
+        self._school_order = {sch: i for i, sch in enumerate(self.exams)}
+        self._application_ranks = data.application_ranks()
+        # schools with remaining seats and applicants, only they make new offers
+        self._active = {sch for sch in self.exams if self._is_active(sch)}
+
+    @property
+    def remaining_applicants(self) -> Dict[Any, List]:
+        return {
+            sch: list(sts[self.exam_positions[sch] :])
+            for sch, sts in self.exams.items()
         }
 
+    def _is_active(self, sch) -> bool:
+        # school is not done when
+        # - there are still some remaining applicant
+        # - AND the school still have remaining seats
+        return bool(
+            self.remaining_seats[sch]
+            and self.exam_positions[sch] < len(self.exams[sch])
+        )
+
     def is_done(self) -> bool:
-        is_done = True
-        for sch in self.schools:
-            # school is not done when
-            # - there are still some remaining applicant
-            # - AND the school still have remaining seats
-            school_not_done = (
-                self.remaining_seats[sch] and self.remaining_applicants[sch]
-            )
-            is_done = is_done and not school_not_done
-            if not is_done:
-                break
-        return is_done
+        return not self._active
 
     def step(self) -> Dict[str, Any]:
         # 1. new offers in this round (identical to naive mechanism here)
         offers = defaultdict(set)
-        for sch, sts in self.remaining_applicants.items():
-            for st in sts[: self.remaining_seats[sch]]:
+        offered = {}
+        for sch in sorted(self._active, key=self._school_order.get):
+            position = self.exam_positions[sch]
+            offered[sch] = self.exams[sch][
+                position : position + self.remaining_seats[sch]
+            ]
+            for st in offered[sch]:
                 offers[st].add(sch)
-        # 2. move already accepted to offers
+            # 4. remove the evaluated applicants from the remaining
+            self.exam_positions[sch] = position + len(offered[sch])
+        new_offers = sum(len(sts) for sts in offered.values())
+        if self.trace is not None:
+            best_before = {st: self.best_offer.get(st) for st in offers}
+            cutoffs = self._trace_offers(offered)
+        # 2. already accepted students compare the new offers with their best one
+        changed = set(offered)
+        for st, offered_schools in offers.items():
+            best = self.best_offer.get(st)
+            if best is not None:
+                offered_schools.add(best)
+            # 3. select the best offers
+            sch = min(offered_schools, key=self._application_ranks[st].__getitem__)
+            if sch != best:
+                if best is not None:
+                    self.accepted[best].remove(st)
+                    changed.add(best)
+                self.accepted[sch].add(st)
+                self.best_offer[st] = sch
+        rejections = sum(len(schs) for schs in offers.values()) - len(offers)
+        if self.trace is not None:
+            self._trace_choices(offers, best_before, cutoffs)
+        self.count(offers=new_offers, rejections=rejections)
+        # 5. update remaining seats of the schools that made or lost an acceptance
+        for sch in changed:
+            self.remaining_seats[sch] = self.seats[sch] - len(self.accepted[sch])
+            if self._is_active(sch):
+                self._active.add(sch)
+            else:
+                self._active.discard(sch)
+        if not self.record_steps:
+            return {"__name__": self.__class__.__name__}
+        # the conditionally accepted students are in the offers for the logs
         for sch, sts in self.accepted.items():
             for st in sts:
                 offers[st].add(sch)
-        self.accepted = {sch: set() for sch in self.schools}
-        # 3. select the best offers
-        for st, offered_schools in offers.items():
-            for sch in self.applications[st]:
-                # accept the best and continue with next student
-                if sch in offered_schools:
-                    self.accepted[sch].add(st)
-                    break
-        # 4. update remove the evaluated applicants from the remaining
-        for sch in self.schools:
-            self.remaining_applicants[sch] = self.remaining_applicants[sch][
-                self.remaining_seats[sch] :
-            ]
-        # 5. update remaining seats
-        for sch in self.schools:
-            self.remaining_seats[sch] = self.seats[sch] - len(self.accepted[sch])
         # return logs
         return deepcopy(
             {
@@ -97,6 +143,31 @@ class SchoolOptimalSM(Mechanism):
             }
         )
 
+    def _trace_offers(self, offered) -> Dict[Any, int]:
+        # the last student with an offer in this round is the cutoff
+        cutoffs = {}
+        for sch, sts in offered.items():
+            ranks = self.exam_ranks[sch]
+            cutoffs[sch] = ranks[sts[-1]] if sts else -1
+            for st in sts:
+                self.emit("offered", st, sch, rank=ranks[st], cutoff=cutoffs[sch])
+        return cutoffs
+
+    def _trace_choices(self, offers, best_before, cutoffs):
+        for st, offered_schools in offers.items():
+            # in the order of the application, so that the trace is deterministic
+            for sch in self.applications[st]:
+                if sch not in offered_schools:
+                    continue
+                if self.best_offer[st] == sch:
+                    if best_before.get(st) == sch:
+                        continue
+                    event = "held"
+                else:
+                    event = "declined"
+                rank = self.exam_ranks[sch][st]
+                self.emit(event, st, sch, rank=rank, cutoff=cutoffs.get(sch, -1))
+
     def allocate(self) -> Allocation:
         accepted = {sch: frozenset(sts) for sch, sts in self.accepted.items()}
         all_accepted = {st for sts in self.accepted.values() for st in sts}
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple, Type, Union
+import numpy as np
+from .interned import InternedData
+from .logger import TimingLogger
+from .mechanism import Mechanism
+from .profile import Profile
+
+_ARRAYS = ("applications", "exam_ranks", "exam_students", "exam_offsets", "seats")
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Small picklable description of a numpy array stored in shared memory."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class SharedInstanceDescriptor:
+    """
+    Everything a worker needs to attach to a shared instance. Students and schools
+    are identified by their indices, the parent translates them back to the ids.
+    """
+
+    applications: SharedArray
+    exam_ranks: SharedArray
+    exam_students: SharedArray
+    exam_offsets: SharedArray
+    seats: SharedArray
+
+
+class SharedInstance:
+    """
+    Read-only copy of an InternedData instance in shared memory. Created once in the
+    parent process, workers attach to it through the small `descriptor`:
+
+        with SharedInstance(interned) as shared:
+            executor.submit(work, shared.descriptor, ...)
+    """
+
+    def __init__(self, interned: InternedData):
+        self.interned = interned
+        self._blocks = []
+        arrays = {}
+        for key in _ARRAYS:
+            array = getattr(interned, key)
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            self._blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            arrays[key] = SharedArray(block.name, array.shape, array.dtype.str)
+        self.descriptor = SharedInstanceDescriptor(**arrays)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> SharedInstance:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# blocks attached in this (worker) process, the most recent ones are kept alive
+# for repeated tasks on the same instance
+_MAX_ATTACHED = 8
+_attached: Dict[SharedInstanceDescriptor, Tuple[list, InternedData]] = OrderedDict()
+
+
+def attach(descriptor: SharedInstanceDescriptor) -> InternedData:
+    """
+    Attach to a shared instance without copying. Students and schools of the returned
+    InternedData are their indices. Repeated calls in the same process are free.
+    """
+    if descriptor not in _attached:
+        blocks, arrays = [], {}
+        for field in fields(descriptor):
+            spec = getattr(descriptor, field.name)
+            # pool workers share the resource tracker of the parent, which owns
+            # and eventually unlinks the block
+            block = shared_memory.SharedMemory(name=spec.name)
+            blocks.append(block)
+            array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=block.buf)
+            array.flags.writeable = False
+            arrays[field.name] = array
+        num_students = descriptor.applications.shape[0]
+        num_schools = descriptor.seats.shape[0]
+        interned = InternedData(
+            students=tuple(range(num_students)),
+            schools=tuple(range(num_schools)),
+            **arrays,
+        )
+        _attached[descriptor] = (blocks, interned)
+        if len(_attached) > _MAX_ATTACHED:
+            old_blocks, old_interned = _attached.popitem(last=False)[1]
+            del old_interned
+            for block in old_blocks:
+                block.close()
+    _attached.move_to_end(descriptor)
+    return _attached[descriptor][1]
+
+
+def evaluate_shared(
+    descriptor: SharedInstanceDescriptor,
+    mechanism: Type[Mechanism],
+    students: Optional[np.ndarray] = None,
+    schools: Optional[np.ndarray] = None,
+    profile: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, Profile]]:
+    """
+    Worker side of a shared evaluation: attach to the instance, evaluate the mechanism
+    (optionally only on a subset of students and schools) and return the allocation as
+    a compact array of school indices (-1 for rejected) aligned with `students`.
+    With `profile`, the Profile of the run is returned as well (the metrics registry
+    of the parent process is not visible in the workers).
+
+    The mechanisms work on AdmissionData, so the component is converted to it here:
+    only the instance itself is shared, the memory of the worker grows with the size
+    of the component it evaluates.
+    """
+    interned = attach(descriptor)
+    data = interned.to_admission_data(students, schools)
+    if profile:
+        logger = TimingLogger()
+        allocation = mechanism(data, logger=logger).evaluate()
+    else:
+        allocation = mechanism(data).evaluate()
+    position = {st: i for i, st in enumerate(data.applications)}
+    assignment = np.full(len(position), -1, dtype=np.int32)
+    for sch, sts in allocation.accepted.items():
+        for st in sts:
+            assignment[position[st]] = sch
+    if profile:
+        return assignment, logger.profile
+    return assignment
@@ -0,0 +1,83 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Optional, Sequence, Type
+from . import metrics
+from .domain import AdmissionData, Allocation
+from .interned import InternedData
+from .mechanism import Mechanism
+from .shared import SharedInstance, evaluate_shared
+
+
+def run_simulations(
+    instances: Sequence[AdmissionData],
+    mechanisms: Sequence[Type[Mechanism]],
+    jobs: Optional[int] = None,
+) -> List[List[Allocation]]:
+    """
+    Evaluate every mechanism on every instance in a process pool.
+
+    Each instance is copied once into shared memory, workers only receive a small
+    descriptor and send back the allocation as an int array, so memory stays flat
+    regardless of the number of workers.
+
+    With active metrics (see `metrics.collect`), the queue depth, finished tasks
+    and instances and the profiles of all the runs are reported while running.
+
+    Returns:
+        Allocations indexed as `result[instance][mechanism]`.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    registry = metrics.active_registry()
+    profile = registry is not None
+    with ExitStack() as stack:
+        executor = stack.enter_context(ProcessPoolExecutor(jobs))
+        interned, futures = [], []
+        for data in instances:
+            inst = InternedData.from_admission_data(data)
+            shared = stack.enter_context(SharedInstance(inst))
+            interned.append(inst)
+            futures.append(
+                [
+                    executor.submit(
+                        evaluate_shared, shared.descriptor, mechanism, profile=profile
+                    )
+                    for mechanism in mechanisms
+                ]
+            )
+            if registry is not None:
+                _track(registry, futures[-1])
+        # shared blocks are released only after all the results are collected
+        results = []
+        for data, inst, inst_futures in zip(instances, interned, futures):
+            assignments = [f.result() for f in inst_futures]
+            if profile:
+                assignments = [assignment for assignment, _ in assignments]
+            allocations = [inst.allocation(a) for a in assignments]
+            for allocation in allocations:
+                allocation.names = data.names
+            results.append(allocations)
+        return results
+
+
+def _track(registry: metrics.MetricsRegistry, futures: List[Future]):
+    # report the tasks of an instance as they finish, not when they are collected
+    remaining = len(futures)
+    lock = threading.Lock()
+    registry.add("admissions_simulation_queue_depth", remaining)
+
+    def done(future: Future):
+        nonlocal remaining
+        registry.add("admissions_simulation_queue_depth", -1)
+        registry.inc("admissions_simulation_tasks_total")
+        if not future.cancelled() and future.exception() is None:
+            registry.observe_profile(future.result()[1])
+        with lock:
+            remaining -= 1
+            finished = remaining == 0
+        if finished:
+            registry.inc("admissions_simulation_instances_total")
+
+    for future in futures:
+        future.add_done_callback(done)
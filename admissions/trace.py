@@ -0,0 +1,204 @@
+"""
+Per-student event trace of a mechanism run, answering questions like "why was
+this student not admitted to that school?" without reading the step-by-step report.
+
+    trace = StudentTrace()
+    DeferredAcceptance(data, trace=trace).evaluate()
+    index = trace.index()
+    index.save("trace.npz")
+    ...
+    for event in TraceIndex.load("trace.npz").history(student):
+        print(event)
+
+Events are recorded in columns (step, student, school, event, rank, cutoff), the
+index sorts them by student (CSR layout), so the history of a student is read in
+O(number of its events).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import numpy as np
+from .domain import ids_from_json, ids_to_json
+
+# event kinds, stored by their position
+EVENTS = (
+    "applied",  # the student applied to the school
+    "offered",  # the school offered a seat to the student
+    "held",  # the student holds a (conditional) seat at the school
+    "rejected",  # the school rejected the student
+    "declined",  # the student declined an offer for a better school
+    "struck_off",  # the student was struck off the list of the school
+    "not_admitted",  # final result: not admitted to a school preferred to the result
+    "admitted",  # final result: admitted to the school
+    "unplaced",  # final result: not admitted anywhere
+)
+_EVENT_CODES = {event: i for i, event in enumerate(EVENTS)}
+_COLUMNS = ("step", "student", "school", "event", "rank", "cutoff")
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """
+    Single event of a student. `rank` is the position of the student in the exam
+    results of the school and `cutoff` the position of the last student holding
+    a seat at the school after the step (both from 0, -1 if not applicable).
+    """
+
+    step: int
+    event: str
+    school: Any
+    rank: int = -1
+    cutoff: int = -1
+
+    def __str__(self):
+        text = f"step {self.step}: {self.event}"
+        if self.school is not None:
+            text += f" {self.school}"
+        details = []
+        if self.rank >= 0:
+            details.append(f"rank {self.rank + 1}")
+        if self.cutoff >= 0:
+            details.append(f"cutoff {self.cutoff + 1}")
+        return text + (f" ({', '.join(details)})" if details else "")
+
+
+class StudentTrace:
+    """Collects the events of a run, pass it to a mechanism as `trace`."""
+
+    def __init__(self):
+        self._students: Dict[Any, int] = {}
+        self._schools: Dict[Any, int] = {}
+        self._columns: Dict[str, List[int]] = {c: [] for c in _COLUMNS}
+
+    def __len__(self):
+        return len(self._columns["step"])
+
+    @staticmethod
+    def _code(codes: Dict[Any, int], x: Any) -> int:
+        code = codes.get(x)
+        if code is None:
+            code = codes[x] = len(codes)
+        return code
+
+    def emit(
+        self,
+        step: int,
+        event: str,
+        student: Any,
+        school: Any = None,
+        rank: int = -1,
+        cutoff: int = -1,
+    ):
+        columns = self._columns
+        columns["step"].append(step)
+        columns["student"].append(self._code(self._students, student))
+        columns["school"].append(
+            -1 if school is None else self._code(self._schools, school)
+        )
+        columns["event"].append(_EVENT_CODES[event])
+        columns["rank"].append(rank)
+        columns["cutoff"].append(cutoff)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Events recorded so far, for checkpoints of the run."""
+        return {
+            "students": list(self._students),
+            "schools": list(self._schools),
+            "columns": {
+                c: np.asarray(v, dtype=np.int32) for c, v in self._columns.items()
+            },
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        self._students = {st: i for i, st in enumerate(state["students"])}
+        self._schools = {sch: i for i, sch in enumerate(state["schools"])}
+        self._columns = {c: v.tolist() for c, v in state["columns"].items()}
+
+    def index(self) -> TraceIndex:
+        columns = {c: np.asarray(v, dtype=np.int32) for c, v in self._columns.items()}
+        columns["event"] = columns["event"].astype(np.int8)
+        order = np.argsort(columns["student"], kind="stable")
+        counts = np.bincount(columns["student"], minlength=len(self._students))
+        offsets = np.zeros(len(self._students) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return TraceIndex(
+            students=list(self._students),
+            schools=list(self._schools),
+            offsets=offsets,
+            columns={c: v[order] for c, v in columns.items() if c != "student"},
+        )
+
+
+class TraceIndex:
+    """
+    Events sorted by student: the events of the i-th student are the rows
+    `offsets[i]:offsets[i + 1]` of the columns.
+    """
+
+    def __init__(
+        self,
+        students: List[Any],
+        schools: List[Any],
+        offsets: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ):
+        self.students = students
+        self.schools = schools
+        self.offsets = offsets
+        self.columns = columns
+        self._student_codes = {st: i for i, st in enumerate(students)}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __contains__(self, student: Any) -> bool:
+        return student in self._student_codes
+
+    def history(self, student: Any) -> List[TraceEvent]:
+        """All events of the student in the order they happened."""
+        code = self._student_codes.get(student)
+        if code is None:
+            return []
+        start, end = self.offsets[code], self.offsets[code + 1]
+        rows = zip(
+            *(self.columns[c][start:end].tolist() for c in _COLUMNS if c != "student")
+        )
+        return [
+            TraceEvent(
+                step=step,
+                event=EVENTS[event],
+                school=self.schools[school] if school >= 0 else None,
+                rank=rank,
+                cutoff=cutoff,
+            )
+            for step, school, event, rank, cutoff in rows
+        ]
+
+    def explain(self, student: Any) -> str:
+        return "\n".join(str(event) for event in self.history(student))
+
+    def save(self, path: str):
+        """
+        Compressed npz with the columns and the ids (as JSON).
+
+        Raises:
+            ValueError: if the ids are not ints, strings or tuples of them
+        """
+        np.savez_compressed(
+            path,
+            offsets=self.offsets,
+            students=np.array(ids_to_json(self.students)),
+            schools=np.array(ids_to_json(self.schools)),
+            **self.columns,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> TraceIndex:
+        with np.load(path) as f:
+            return cls(
+                students=ids_from_json(str(f["students"])),
+                schools=ids_from_json(str(f["schools"])),
+                offsets=f["offsets"],
+                columns={c: f[c] for c in _COLUMNS if c != "student"},
+            )
@@ -0,0 +1,139 @@
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from numbers import Integral
+from typing import Any, List, Optional
+from .domain import AdmissionData
+
+# codes of issues that make the data unusable for the mechanisms
+ERRORS = {
+    "duplicate_school": "school is listed more than once on the application",
+    "unknown_school": "school on the application has no exam results",
+    "duplicate_student": "student is listed more than once in the exam results",
+    "unknown_student": "student in the exam results has no application",
+    "not_applied": "student is in the exam results of a school they did not apply to",
+    "missing_seats": "school has no number of seats",
+    "invalid_seats": "number of seats is not a non-negative integer",
+}
+# codes of suspicious, but still well-defined inputs (all mechanisms evaluate them,
+# e.g. a student missing in the exam results is never accepted by the school)
+WARNINGS = {
+    "not_in_exam": "student applied to a school, but is missing in its exam results",
+    "unknown_seats": "seats are given for a school without exam results",
+}
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    code: str
+    student: Optional[Any] = None
+    school: Optional[Any] = None
+
+    @property
+    def is_error(self) -> bool:
+        return self.code in ERRORS
+
+    def __str__(self):
+        message = ERRORS.get(self.code) or WARNINGS[self.code]
+        where = ", ".join(
+            f"{k}={v!r}"
+            for k, v in (("student", self.student), ("school", self.school))
+            if v is not None
+        )
+        return f"{self.code}: {message} ({where})"
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.is_error]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if not issue.is_error]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def counts(self) -> Counter:
+        return Counter(issue.code for issue in self.issues)
+
+    def raise_for_errors(self):
+        if not self.ok:
+            raise InvalidAdmissionData(self)
+
+    def __str__(self):
+        if not self.issues:
+            return "Admission data are valid."
+        counts = ", ".join(f"{code} = {n}" for code, n in self.counts().items())
+        lines = [f"{len(self.errors)} errors, {len(self.warnings)} warnings ({counts})"]
+        # the first few issues are enough to locate the problem
+        lines += [f"  - {issue}" for issue in self.issues[:10]]
+        if len(self.issues) > 10:
+            lines.append(f"  - ... and {len(self.issues) - 10} more")
+        return "\n".join(lines)
+
+
+class InvalidAdmissionData(ValueError):
+    def __init__(self, report: ValidationReport):
+        super().__init__(str(report))
+        self.report = report
+
+
+def validate(data: AdmissionData) -> ValidationReport:
+    """
+    Check all cross-references of the admission data in one linear pass, using set
+    operations over (student, school) pairs from applications and exam results.
+    """
+    issues = []
+    schools = data.school_set()
+
+    applied = set()
+    for st, schs in data.applications.items():
+        app = set(schs)
+        if len(app) < len(schs):
+            duplicates = [sch for sch, n in Counter(schs).items() if n > 1]
+            issues += [
+                ValidationIssue("duplicate_school", st, sch) for sch in duplicates
+            ]
+        issues += [ValidationIssue("unknown_school", st, sch) for sch in app - schools]
+        applied.update((st, sch) for sch in app)
+
+    students = data.student_set()
+    examined = set()
+    for sch, sts in data.exams.items():
+        exam = set(sts)
+        if len(exam) < len(sts):
+            duplicates = [st for st, n in Counter(sts).items() if n > 1]
+            issues += [
+                ValidationIssue("duplicate_student", st, sch) for st in duplicates
+            ]
+        issues += [
+            ValidationIssue("unknown_student", st, sch) for st in exam - students
+        ]
+        examined.update((st, sch) for st in exam)
+
+    issues += [
+        ValidationIssue("not_applied", st, sch)
+        for st, sch in examined - applied
+        if st in students
+    ]
+    issues += [
+        ValidationIssue("not_in_exam", st, sch)
+        for st, sch in applied - examined
+        if sch in schools
+    ]
+
+    seats = set(data.seats.keys())
+    issues += [ValidationIssue("missing_seats", school=sch) for sch in schools - seats]
+    issues += [ValidationIssue("unknown_seats", school=sch) for sch in seats - schools]
+    issues += [
+        ValidationIssue("invalid_seats", school=sch)
+        for sch, n in data.seats.items()
+        if isinstance(n, bool) or not isinstance(n, Integral) or n < 0
+    ]
+    return ValidationReport(issues)
@@ -1,6 +1,7 @@
+import os
 import sys
-# figure out better way later
-sys.path.append('/home/thomas/code/idea/admissions')
+# run from a checkout, or install the package and use the `admissions` command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from admissions.mechanism import DeferredAcceptance, CermatMechanism
 from admissions.data import example_1, example_2, example_3, example_4
@@ -1,7 +1,8 @@
+import os
 import sys
 
-# figure out better way later
-sys.path.append("/home/thomas/code/idea/admissions")
+# run from a checkout, or install the package and use the `admissions` command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import textwrap
 from admissions import (
@@ -1,8 +1,8 @@
 import os
 import sys
 
-# figure out better way later
-sys.path.append("/home/thomas/code/idea/admissions")
+# run from a checkout, or install the package and use the `admissions` command
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import textwrap
 import admissions
@@ -12,9 +12,10 @@ from admissions import (
     CermatMechanism,
     SchoolOptimalSM,
 )
-from admissions.logger import GraphicLogger
+from admissions.report import PageCache, build_switcher
 from admissions.data import example_1, example_2, example_3, example_4, example_cermat
 import admissions.reportree as rt
+from admissions.reportree import asset_cache
 
 """
 Pro každý mechanismus vytiskni na obrazkovku textově jeho průběh po jednotlivých krocích.
@@ -42,6 +43,11 @@ intro_text = [
     'Jednotlivé podstránky ukazují průběh vybraných algoritmů na různých modelových situacích, aby ilustrovaly jejich silné a slabé stránky. První dva příklady, <i>"Zadáni dle Cermatu"</i> a <i>"Optimalita pro studenty vs. pro školy"</i> jasně ukazují, proč je mechanismus odloženého přijetí lepší než zvažovaná alternativa.',
 ]
 
+# compiled stylesheet and encoded logo are reused across runs
+asset_cache.set_cache_dir(
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "assets")
+)
+
 doc = rt.Doc(max_width=1200, title=title)
 with doc.tag("div", klass="container"):
     with doc.tag("div", klass="row"):
@@ -108,17 +114,17 @@ with doc.tag("div", klass="container"):
 
     sw["Úvod"] = doc_intro
 
-    for example in examples:
-        for mech_label, mechanism in mechanisms.items():
-            ex_label = (
-                example.__doc__.split("\n")[1] if example.__doc__ is not None else ""
-            )
-            logger = GraphicLogger()
-            logger.doc.md(textwrap.dedent(example.__doc__ or ""))
-            logger.doc.md(textwrap.dedent(mechanism.__doc__))
-            mech = mechanism(example(), logger=logger)
-            mech.evaluate()
-            sw[ex_label][mech_label] = logger.doc
+    # every page is rendered in a worker process, only pages whose data, mechanism or
+    # template changed are rendered again, results and step history are reused as well
+    root_dir = os.path.dirname(os.path.dirname(__file__))
+    pages = build_switcher(
+        examples,
+        mechanisms,
+        cache_path=os.path.join(root_dir, ".cache", "results"),
+        page_cache=PageCache(os.path.join(root_dir, ".cache", "pages")),
+    )
+    for ex_label, mech_pages in pages.items():
+        sw[ex_label] = mech_pages
 
     doc.switcher(sw)
 
@@ -0,0 +1,50 @@
+from admissions import (
+    AdmissionData,
+    CermatMechanism,
+    CutoffMechanism,
+    DeferredAcceptance,
+    NaiveMechanism,
+    SchoolOptimalSM,
+)
+from admissions.logger import BasicLogger
+
+# all mechanisms of the package, the tests common to them are parametrized by it
+MECHANISMS = [
+    DeferredAcceptance,
+    CermatMechanism,
+    NaiveMechanism,
+    SchoolOptimalSM,
+    CutoffMechanism,
+]
+
+
+class RecordingLogger(BasicLogger):
+    """Keeps the data of every step instead of printing them."""
+
+    def __init__(self):
+        super().__init__()
+        self.steps = []
+
+    def log_start(self, admission_data):
+        pass
+
+    def log_step(self, data):
+        self.steps.append(data)
+
+    def log_end(self, allocation):
+        self.allocation = allocation
+
+
+def with_tuple_ids(data: AdmissionData) -> AdmissionData:
+    """The same data with students (st, 1) and schools ("school", sch)."""
+    return AdmissionData(
+        applications={
+            (st, 1): tuple(("school", sch) for sch in schs)
+            for st, schs in data.applications.items()
+        },
+        exams={
+            ("school", sch): tuple((st, 1) for st in sts)
+            for sch, sts in data.exams.items()
+        },
+        seats={("school", sch): n for sch, n in data.seats.items()},
+    )
@@ -0,0 +1,67 @@
+from admissions import CutoffMechanism, DeferredAcceptance, CermatMechanism
+from admissions import cache as cache_module
+from admissions.cache import ResultCache, mechanism_key, source_modules
+from admissions.data import example_cermat, example_3
+from conftest import RecordingLogger
+
+
+def test_fingerprint_is_content_based():
+    assert example_cermat().fingerprint() == example_cermat().fingerprint()
+    assert example_cermat().fingerprint() != example_3().fingerprint()
+
+
+def test_mechanism_key():
+    assert mechanism_key(DeferredAcceptance) != mechanism_key(CermatMechanism)
+    assert mechanism_key(DeferredAcceptance) == mechanism_key(DeferredAcceptance)
+
+
+def test_mechanism_key_covers_helper_modules(monkeypatch):
+    assert "admissions.domain" in source_modules(DeferredAcceptance)
+    assert "admissions.interned" in source_modules(CutoffMechanism)
+    key = mechanism_key(CutoffMechanism)
+    getsource = cache_module.inspect.getsource
+
+    def edited_getsource(module):
+        source = getsource(module)
+        return source + "# edited\n" if module.__name__.endswith("interned") else source
+
+    monkeypatch.setattr(cache_module.inspect, "getsource", edited_getsource)
+    monkeypatch.setattr(cache_module, "_source_hashes", {})
+    assert mechanism_key(CutoffMechanism) != key
+
+
+class MutatingLogger(RecordingLogger):
+    def log_step(self, data):
+        super().log_step(data)
+        data.clear()
+
+
+def test_result_cache(tmp_path):
+    cache = ResultCache(maxsize=1, path=str(tmp_path))
+    data = example_cermat()
+    expected = DeferredAcceptance(data).evaluate()
+    assert cache.evaluate(DeferredAcceptance, data) == expected
+    assert cache.evaluate(DeferredAcceptance, example_cermat()) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # step history is recorded for loggers and replayed on a hit
+    first, second = RecordingLogger(), RecordingLogger()
+    cache.evaluate(CermatMechanism, data, logger=first)
+    cache.evaluate(CermatMechanism, data, logger=second)
+    assert first.steps == second.steps != []
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # evicted from memory, but still on disk
+    cache.clear()
+    fresh = ResultCache(path=str(tmp_path))
+    assert fresh.evaluate(DeferredAcceptance, data) == expected
+    assert (fresh.hits, fresh.misses) == (1, 0)
+
+
+def test_recorded_steps_are_copies():
+    cache = ResultCache()
+    data = example_cermat()
+    cache.evaluate(DeferredAcceptance, data, logger=MutatingLogger())
+    replayed = RecordingLogger()
+    cache.evaluate(DeferredAcceptance, data, logger=replayed)
+    assert replayed.steps == list(DeferredAcceptance(data).iter_steps())
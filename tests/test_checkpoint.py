@@ -0,0 +1,74 @@
+import itertools
+import pytest
+from admissions import CermatMechanism, DeferredAcceptance, StudentTrace
+from admissions.data import random_example
+from conftest import MECHANISMS
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_resume(mechanism, tmp_path):
+    data = random_example(num_students=80, num_schools=6, seats=8, seed=5)
+    expected = mechanism(data).evaluate()
+    num_steps = sum(1 for _ in mechanism(data).iter_steps())
+    path = str(tmp_path / "run.ckpt")
+
+    interrupted = mechanism(data)
+    list(itertools.islice(interrupted.iter_steps(), num_steps // 2))
+    interrupted.save_checkpoint(path)
+
+    resumed = mechanism(data)
+    resumed.restore_checkpoint(path)
+    assert resumed.num_steps == num_steps // 2
+    assert resumed.evaluate() == expected
+    assert resumed.num_steps == num_steps
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_resume_with_trace(mechanism, tmp_path):
+    data = random_example(num_students=80, num_schools=6, seats=8, seed=5)
+    trace = StudentTrace()
+    mechanism(data, trace=trace).evaluate()
+    expected = trace.index()
+    num_steps = sum(1 for _ in mechanism(data).iter_steps())
+    path = str(tmp_path / "run.ckpt")
+
+    interrupted = mechanism(data, trace=StudentTrace())
+    list(itertools.islice(interrupted.iter_steps(), num_steps // 2))
+    interrupted.save_checkpoint(path)
+    trace = StudentTrace()
+    resumed = mechanism(data, trace=trace)
+    resumed.restore_checkpoint(path)
+    resumed.evaluate()
+    index = trace.index()
+    assert len(index) == len(expected)
+    for st in data.applications:
+        assert index.history(st) == expected.history(st)
+
+    # the events before a checkpoint saved without a trace are unknown
+    mechanism(data).save_checkpoint(path)
+    with pytest.raises(ValueError, match="trace"):
+        mechanism(data, trace=StudentTrace()).restore_checkpoint(path)
+
+
+@pytest.mark.parametrize("mechanism", [DeferredAcceptance, CermatMechanism])
+def test_periodic_checkpoint(mechanism, tmp_path):
+    data = random_example(num_students=80, num_schools=6, seats=8, seed=5)
+    expected = mechanism(data).evaluate()
+    path = str(tmp_path / "run.ckpt")
+
+    interrupted = mechanism(data).checkpoint(path, every=2)
+    list(itertools.islice(interrupted.iter_steps(), 3))
+    resumed = mechanism(data).checkpoint(path, every=2)
+    assert resumed.num_steps == 2
+    assert resumed.evaluate() == expected
+
+
+def test_checkpoint_mismatch(tmp_path):
+    data = random_example(num_students=40, num_schools=4, seats=6, seed=1)
+    other = random_example(num_students=40, num_schools=4, seats=6, seed=2)
+    path = str(tmp_path / "run.ckpt")
+    DeferredAcceptance(data).save_checkpoint(path)
+    with pytest.raises(ValueError, match="fingerprint"):
+        DeferredAcceptance(other).restore_checkpoint(path)
+    with pytest.raises(ValueError, match="mechanism"):
+        CermatMechanism(data).restore_checkpoint(path)
@@ -0,0 +1,97 @@
+import json
+import pytest
+from admissions import CermatMechanism, DeferredAcceptance, EventLog, TraceIndex
+from admissions.columnar import AllocationColumns
+from admissions.cli import allocation_to_json, main, read_instance
+from admissions.data import example_cermat, random_example
+from conftest import MECHANISMS
+
+
+def write_instance(path, data):
+    instance = {
+        "applications": {st: list(schs) for st, schs in data.applications.items()},
+        "exams": {sch: list(sts) for sch, sts in data.exams.items()},
+        "seats": dict(data.seats),
+    }
+    path.write_text(json.dumps(instance, ensure_ascii=False), encoding="utf-8")
+
+
+def test_cli(tmp_path, capsys):
+    instance = tmp_path / "instance.json"
+    write_instance(instance, example_cermat().named())
+    output = tmp_path / "out"
+    status = main(
+        [
+            str(instance),
+            "-m",
+            "da",
+            "-m",
+            "CermatMechanism",
+            "--jobs",
+            "2",
+            "--output",
+            str(output),
+            "--metrics",
+            str(output / "metrics.prom"),
+            "--profile",
+            str(output / "run.prof"),
+            "--columns",
+            "npz",
+            "--mem",
+        ]
+    )
+    assert status == 0
+    results = json.loads((output / "allocations.json").read_text(encoding="utf-8"))
+    data = read_instance(str(instance))
+    for mechanism in [DeferredAcceptance, CermatMechanism]:
+        expected = allocation_to_json(mechanism(data).evaluate())
+        assert results[mechanism.__name__] == expected
+        columns = AllocationColumns.load_npz(
+            str(output / f"allocation_{mechanism.__name__}.npz")
+        )
+        assert allocation_to_json(columns.to_allocation()) == expected
+    assert (output / "metrics.prom").exists() and (output / "run.prof").exists()
+    assert "Peak memory" in capsys.readouterr().out
+
+
+def test_cli_invalid_data(tmp_path, capsys):
+    instance = tmp_path / "instance.json"
+    instance.write_text(
+        json.dumps({"applications": {"A": [1, 1]}, "exams": {"1": ["A"]}, "seats": {}})
+    )
+    assert main([str(instance), "--output", str(tmp_path)]) == 1
+    assert "duplicate_school" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        example_cermat().named(),
+        # exam lists of unequal length (22, 24, 19 and 25 students)
+        random_example(num_students=30, num_schools=4, seats=3, seed=1),
+    ],
+)
+def test_cli_report_trace_event_log(tmp_path, data):
+    instance = tmp_path / "instance.json"
+    write_instance(instance, data)
+    output = tmp_path / "out"
+    argv = [str(instance), "--output", str(output), "--report", "--trace"]
+    argv += ["--event-log"] + [arg for m in MECHANISMS for arg in ("-m", m.__name__)]
+    assert main(argv) == 0
+    data = read_instance(str(instance))
+    index = (output / "report" / "index.html").read_text(encoding="utf-8")
+    pages = sorted((output / "report" / "pages").iterdir())
+    assert len(pages) == len(MECHANISMS)
+    assert all("Průběh algoritmu" in page.read_text(encoding="utf-8") for page in pages)
+    for mechanism in MECHANISMS:
+        name = mechanism.__name__
+        allocation = mechanism(data).evaluate()
+        assert name in index
+        trace = TraceIndex.load(str(output / f"trace_{name}.npz"))
+        for sch, sts in allocation.accepted.items():
+            for st in sts:
+                last = trace.history(st)[-1]
+                assert (last.event, last.school) == ("admitted", sch)
+        log = EventLog(str(output / f"events_{name}.log"))
+        log.verify(allocation, data)
+        assert list(log.steps()) == list(mechanism(data).iter_steps())
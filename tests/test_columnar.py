@@ -0,0 +1,109 @@
+import csv
+import pytest
+from admissions import Allocation, DeferredAcceptance
+from admissions.columnar import AllocationColumns
+from admissions.data import example_cermat, random_example
+from conftest import with_tuple_ids
+
+
+def test_student_index():
+    data = random_example(num_students=60, num_schools=6, seats=6, seed=3)
+    allocation = DeferredAcceptance(data).evaluate()
+    for sch, sts in allocation.accepted.items():
+        for st in sts:
+            assert allocation.school_of(st) == sch
+    for st in allocation.rejected:
+        assert allocation.school_of(st) is None
+    assert len(allocation.student_index) == len(data.applications)
+    with pytest.raises(KeyError):
+        allocation.school_of("nobody")
+
+
+def test_columns():
+    data = random_example(num_students=60, num_schools=6, seats=6, seed=3)
+    allocation = DeferredAcceptance(data).evaluate()
+    columns = allocation.columns(data)
+    assert columns.student.tolist() == list(data.applications)
+    ranks = data.application_ranks()
+    for st, sch, rank in zip(
+        columns.student.tolist(), columns.school_ids().tolist(), columns.rank.tolist()
+    ):
+        assert sch == allocation.school_of(st)
+        assert rank == (-1 if sch is None else ranks[st][sch])
+    assert columns.to_allocation() == allocation
+    assert allocation.columns().to_allocation() == allocation
+    assert (allocation.columns().rank == -1).all()
+
+
+def test_exports(tmp_path):
+    data = example_cermat().named()
+    allocation = DeferredAcceptance(data).evaluate()
+    columns = allocation.columns(data)
+
+    columns.to_npz(str(tmp_path / "allocation.npz"))
+    loaded = AllocationColumns.load_npz(str(tmp_path / "allocation.npz"))
+    assert loaded.to_allocation() == allocation
+    assert loaded.rank.tolist() == columns.rank.tolist()
+
+    columns.to_csv(str(tmp_path / "allocation.csv"))
+    with open(tmp_path / "allocation.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(data.applications)
+    for row in rows:
+        assert row["school"] == (allocation.school_of(row["student"]) or "")
+
+
+def test_npz_tuple_ids(tmp_path):
+    # tuple ids are stored as JSON lists and restored on load
+    data = with_tuple_ids(example_cermat())
+    allocation = DeferredAcceptance(data).evaluate()
+    path = str(tmp_path / "allocation.npz")
+    for columns in [allocation.columns(data), allocation.columns()]:
+        assert columns.student.shape == (len(data.applications),)
+        assert columns.to_allocation() == allocation
+        columns.to_npz(path)
+        assert AllocationColumns.load_npz(path).to_allocation() == allocation
+
+    columns.schools = (frozenset(),) + columns.schools[1:]
+    with pytest.raises(ValueError, match="Ids must be"):
+        columns.to_npz(path)
+
+
+def test_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = random_example(num_students=60, num_schools=6, seats=6, seed=3)
+    allocation = DeferredAcceptance(data).evaluate()
+    allocation.columns(data).to_parquet(str(tmp_path / "allocation.parquet"))
+    table = pq.read_table(str(tmp_path / "allocation.parquet")).to_pydict()
+    assert table["student"] == list(data.applications)
+    for st, sch in zip(table["student"], table["school"]):
+        assert sch == allocation.school_of(st)
+
+
+def test_parquet_tuple_ids(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = with_tuple_ids(example_cermat())
+    allocation = DeferredAcceptance(data).evaluate()
+    allocation.columns(data).to_parquet(str(tmp_path / "allocation.parquet"))
+    table = pq.read_table(str(tmp_path / "allocation.parquet")).to_pydict()
+    # ids other than ints and strings are written as their text
+    assert table["student"] == [str(st) for st in data.applications]
+    assert table["school"] == [
+        None if allocation.school_of(st) is None else str(allocation.school_of(st))
+        for st in data.applications
+    ]
+
+
+def test_csv_quoting(tmp_path):
+    allocation = Allocation(
+        accepted={"A, B": frozenset({'say "hi"'}), 2: frozenset({3})},
+        rejected=frozenset({"x"}),
+    )
+    allocation.columns().to_csv(str(tmp_path / "allocation.csv"))
+    with open(tmp_path / "allocation.csv", newline="", encoding="utf-8") as f:
+        rows = [tuple(row.values()) for row in csv.DictReader(f)]
+    assert sorted(rows) == [
+        ("3", "2", "-1"),
+        ('say "hi"', "A, B", "-1"),
+        ("x", "", "-1"),
+    ]
@@ -0,0 +1,51 @@
+import pytest
+from admissions import AdmissionData, DeferredAcceptance
+from admissions.components import connected_components, evaluate_by_components
+from admissions.data import example_cermat, random_example
+from conftest import MECHANISMS
+
+
+def regional_example(num_regions=4, seed=0):
+    # disjoint random instances glued together, ids prefixed by the region
+    applications, exams, seats = {}, {}, {}
+    for r in range(num_regions):
+        data = random_example(num_students=60, num_schools=5, seats=4, seed=seed + r)
+        applications.update(
+            {
+                (r, st): tuple((r, sch) for sch in schs)
+                for st, schs in data.applications.items()
+            }
+        )
+        exams.update(
+            {(r, sch): tuple((r, st) for st in sts) for sch, sts in data.exams.items()}
+        )
+        seats.update({(r, sch): n for sch, n in data.seats.items()})
+    return AdmissionData(applications=applications, exams=exams, seats=seats)
+
+
+def test_connected_components():
+    assert len(connected_components(example_cermat())) == 1
+    components = connected_components(regional_example(num_regions=4))
+    assert len(components) == 4
+    for comp in components:
+        assert len({st[0] for st in comp.applications}) == 1
+        assert {sch[0] for sch in comp.exams} == {st[0] for st in comp.applications}
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_evaluate_by_components(mechanism, jobs):
+    data = regional_example()
+    expected = mechanism(data).evaluate()
+    result = evaluate_by_components(mechanism, data, jobs=jobs)
+    assert result == expected, "Per-component evaluation differs."
+
+
+def test_single_component_is_serial(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a single component must not start workers")
+
+    monkeypatch.setattr("admissions.components.ProcessPoolExecutor", no_pool)
+    data = example_cermat()
+    result = evaluate_by_components(DeferredAcceptance, data, jobs=2)
+    assert result == DeferredAcceptance(data).evaluate()
@@ -0,0 +1,66 @@
+import pickle
+from dataclasses import FrozenInstanceError
+import pytest
+from admissions import CermatMechanism, CutoffMechanism, DeferredAcceptance, Names
+from admissions.data import example_cermat, example_3
+
+
+def test_frozen_admission_data():
+    data = example_cermat().freeze()
+    assert data.freeze() is data
+    assert data == example_cermat().freeze()
+    assert data != example_3().freeze()
+    assert {data: 1}[example_cermat().freeze()] == 1
+    assert data.fingerprint() == example_cermat().fingerprint()
+    assert pickle.loads(pickle.dumps(data)) == data
+    with pytest.raises(FrozenInstanceError):
+        data.seats = {}
+    with pytest.raises(TypeError):
+        data.seats["Lyceum Mělník"] = 10
+
+
+def test_frozen_indexes_are_shared():
+    data = example_cermat().freeze()
+    assert data.exam_ranks() is data.exam_ranks()
+    assert data.application_ranks() == example_cermat().application_ranks()
+    assert CutoffMechanism(data).interned is CutoffMechanism(data).interned
+    for mechanism in [DeferredAcceptance, CermatMechanism, CutoffMechanism]:
+        assert mechanism(data).evaluate() == mechanism(example_cermat()).evaluate()
+
+
+def test_lazy_names():
+    data = example_cermat()
+    renamed = data.rename(
+        student_names={"Adam": "A."}, school_names={"Lyceum Mělník": "LM"}
+    )
+    # no copies of the data, only the display names change
+    assert renamed.applications is data.applications
+    assert renamed.names.student("A") == "A." and renamed.names.student("B") == "Bára"
+    assert renamed.names.school(2) == "LM"
+    assert renamed.named().applications["A."] == (
+        "LM",
+        "SOŠ Smíchov",
+        "Gymnázium Nymburk",
+    )
+    assert data.names.resolve({1: {"A", "B"}, "rank": 2}, "school") == {
+        "Gymnázium Nymburk": {"Adam", "Bára"},
+        "rank": 2,
+    }
+    frozen = data.freeze()
+    assert frozen.rename({}, {2: "LM"}).exam_ranks() is frozen.exam_ranks()
+
+
+def test_names_resolve_by_role():
+    names = Names(students={0: "Anna", 1: "Bob"}, schools={0: "Gymnázium"})
+    assert names.resolve({0: {1}}, "school") == {"Gymnázium": {"Bob"}}
+    assert names.resolve({1: (0,)}, "student") == {"Bob": ("Gymnázium",)}
+    assert names.resolve_step(
+        {"Accepted": {0: {1}}, "Offers": {0: {0}}, "Current best match": {(1, 0)}}
+    ) == {
+        "Accepted": {"Gymnázium": {"Bob"}},
+        "Offers": {"Anna": {"Gymnázium"}},
+        "Current best match": {("Bob", "Gymnázium")},
+    }
+    # names are given for the displayed names, no stray name -> name entries
+    renamed = names.rename(student_names={"Anna": "Anežka", 2: "Cyril"})
+    assert renamed.students == {0: "Anežka", 1: "Bob", 2: "Cyril"}
@@ -0,0 +1,90 @@
+import pytest
+from admissions import (
+    CermatMechanism,
+    CorruptEventLog,
+    DeferredAcceptance,
+    EventLog,
+    EventLogger,
+)
+from admissions.data import example_3, example_cermat
+from admissions.logger import GraphicLogger, MultiLogger
+from conftest import MECHANISMS
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_replay(mechanism, tmp_path):
+    path = str(tmp_path / "run.log")
+    original = GraphicLogger()
+    data = example_3()
+    allocation = mechanism(
+        data, logger=MultiLogger(original, EventLogger(path))
+    ).evaluate()
+
+    log = EventLog(path)
+    assert log.mechanism == mechanism.__name__
+    assert list(log.steps()) == list(mechanism(data).iter_steps())
+    log.verify(allocation)
+    log.reproduce(mechanism)
+    replayed = GraphicLogger()
+    assert log.replay(replayed) == allocation
+    assert replayed.doc.getvalue() == original.doc.getvalue()
+
+
+def test_deterministic(tmp_path):
+    paths = [str(tmp_path / f"run_{i}.log") for i in range(2)]
+    for path in paths:
+        DeferredAcceptance(example_cermat(), logger=EventLogger(path)).evaluate()
+    with open(paths[0], "rb") as f, open(paths[1], "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_step_data(tmp_path):
+    path = str(tmp_path / "run.log")
+    DeferredAcceptance(example_cermat(), logger=EventLogger(path)).evaluate()
+    log = EventLog(path)
+    steps = list(DeferredAcceptance(example_cermat()).iter_steps())
+    assert log.num_steps == len(steps)
+    assert log.step_data(2) == steps[1]
+    with pytest.raises(IndexError):
+        log.step_data(0)
+
+
+def test_corruption(tmp_path):
+    path = str(tmp_path / "run.log")
+    allocation = CermatMechanism(example_cermat(), logger=EventLogger(path)).evaluate()
+    with open(path, "rb") as f:
+        content = f.read()
+
+    damaged = bytearray(content)
+    damaged[len(content) // 2] ^= 0xFF
+    with open(path, "wb") as f:
+        f.write(damaged)
+    with pytest.raises(CorruptEventLog):
+        EventLog(path)
+
+    with open(path, "wb") as f:
+        f.write(content[:-3])
+    with pytest.raises(CorruptEventLog):
+        EventLog(path)
+
+    with open(path, "wb") as f:
+        f.write(content)
+    log = EventLog(path)
+    with pytest.raises(CorruptEventLog):
+        log.verify(DeferredAcceptance(example_3()).evaluate())
+    with pytest.raises(CorruptEventLog):
+        log.reproduce(DeferredAcceptance)
+    log.verify(allocation)
+
+
+def test_without_data(tmp_path):
+    path = str(tmp_path / "run.log")
+    data = example_cermat()
+    DeferredAcceptance(data, logger=EventLogger(path, include_data=False)).evaluate()
+    log = EventLog(path)
+    assert log.admission_data is None
+    with pytest.raises(ValueError):
+        log.replay(GraphicLogger())
+    with pytest.raises(CorruptEventLog):
+        log.reproduce(DeferredAcceptance, example_3())
+    log.reproduce(DeferredAcceptance, data)
@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+
+# the reporting stack alone takes most of a second to import
+IMPORT_BUDGET = 0.5
+REPORTING_MODULES = ["matplotlib", "pandas", "seaborn", "PIL", "sass", "markdown"]
+
+
+def _run(code: str):
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+def test_core_import_is_light():
+    code = f"""
+import json, sys, time
+start = time.perf_counter()
+import admissions
+from admissions import DeferredAcceptance
+from admissions.logger import Logger
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {REPORTING_MODULES!r} if m in sys.modules]]))
+"""
+    elapsed, loaded = _run(code)
+    assert loaded == []
+    assert elapsed < IMPORT_BUDGET
+
+
+def test_reporting_loaded_on_access():
+    code = """
+import json, sys
+from admissions.logger import GraphicLogger
+import admissions.reportree as rt
+print(json.dumps([GraphicLogger.__name__, rt.Doc.__name__, "matplotlib" in sys.modules]))
+"""
+    assert _run(code) == ["GraphicLogger", "Doc", True]
@@ -5,12 +5,14 @@
 
 import pytest
 from admissions import (
+    AdmissionData,
     DeferredAcceptance,
     CermatMechanism,
     NaiveMechanism,
     SchoolOptimalSM,
+    CutoffMechanism,
 )
-from admissions.data import example_1, example_2, example_cermat
+from admissions.data import example_1, example_2, example_cermat, random_example
 
 
 da_expected = [
@@ -18,14 +20,14 @@ da_expected = [
     (example_2(), {"A": {1}, "B": {2}, "C": {3}}, set()),
     (
         example_cermat(),
-        # accepted
+        # accepted (mechanisms work on ids, names are only displayed)
         {
-            "Gymnázium Nymburk": {"Bára", "Dan", "Eda", "Lenka"},
-            "Lyceum Mělník": {"Adam", "Hanka", "Katka"},
-            "SOŠ Smíchov": {"Cecílie", "Gustav", "Ivana", "Jana", "Marek"},
+            1: {"B", "D", "E", "L"},
+            2: {"A", "H", "K"},
+            3: {"C", "G", "I", "J", "M"},
         },
         # rejected
-        {"Filip"},
+        {"F"},
     ),
 ]
 
@@ -35,12 +37,33 @@ cm_expected = [
     (
         example_cermat(),
         # accepted
+        {
+            1: {"B", "D", "E", "J"},
+            2: {"A", "H", "L"},
+            3: {"C", "G", "I", "K", "M"},
+        },
+        # rejected
+        {"F"},
+    ),
+]
+
+named_expected = [
+    (
+        DeferredAcceptance,
+        {
+            "Gymnázium Nymburk": {"Bára", "Dan", "Eda", "Lenka"},
+            "Lyceum Mělník": {"Adam", "Hanka", "Katka"},
+            "SOŠ Smíchov": {"Cecílie", "Gustav", "Ivana", "Jana", "Marek"},
+        },
+        {"Filip"},
+    ),
+    (
+        CermatMechanism,
         {
             "Gymnázium Nymburk": {"Bára", "Dan", "Eda", "Jana"},
             "Lyceum Mělník": {"Adam", "Hanka", "Lenka"},
             "SOŠ Smíchov": {"Cecílie", "Gustav", "Ivana", "Katka", "Marek"},
         },
-        # rejected
         {"Filip"},
     ),
 ]
@@ -89,3 +112,50 @@ def test_school_optimal_sm_allocation(data, accepted, rejected):
         school_optimal_result.accepted == accepted
     ), "The allocation of accepted students differs."
     assert school_optimal_result.rejected == rejected, "The rejected students differ."
+
+
+@pytest.mark.parametrize("mechanism,accepted,rejected", named_expected)
+def test_named_allocation(mechanism, accepted, rejected):
+    # display names are resolved lazily from the ids
+    result = mechanism(example_cermat()).evaluate().named()
+    assert result.accepted == accepted, "The allocation of accepted students differs."
+    assert result.rejected == rejected, "The rejected students differ."
+
+
+@pytest.mark.parametrize("data,accepted,rejected", da_expected)
+def test_cutoff_allocation(data, accepted, rejected):
+    # the cutoff formulation converges to the same student-optimal matching as DA
+    cutoff_mechanism = CutoffMechanism(data)
+    cutoff_result = cutoff_mechanism.evaluate()
+    assert (
+        cutoff_result.accepted == accepted
+    ), "The allocation of accepted students differs."
+    assert cutoff_result.rejected == rejected, "The rejected students differ."
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cutoff_equals_da_on_random_data(seed):
+    data = random_example(num_students=200, num_schools=15, seats=8, seed=seed)
+    da_result = DeferredAcceptance(data).evaluate()
+    cutoff_result = CutoffMechanism(data).evaluate()
+    assert cutoff_result == da_result, "Cutoff mechanism differs from DA."
+
+
+def test_da_student_missing_in_exam():
+    # student 1 is not in the exam results of A, so A never accepts them
+    data = AdmissionData(
+        applications={1: ("A", "B"), 2: ("A",)},
+        exams={"A": (2,), "B": (1,)},
+        seats={"A": 1, "B": 1},
+    )
+    da_result = DeferredAcceptance(data).evaluate()
+    assert da_result.accepted == {"A": {2}, "B": {1}}
+    assert da_result == CutoffMechanism(data).evaluate()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_school_optimal_sm_equals_cm_on_random_data(seed):
+    data = random_example(num_students=200, num_schools=15, seats=8, seed=seed)
+    sosm_result = SchoolOptimalSM(data).evaluate()
+    cm_result = CermatMechanism(data).evaluate()
+    assert sosm_result == cm_result, "School-optimal SM differs from Cermat."
@@ -0,0 +1,35 @@
+import json
+from admissions import DeferredAcceptance, CermatMechanism, CutoffMechanism, metrics
+from admissions.data import example_cermat, random_example
+from admissions.simulation import run_simulations
+
+
+def test_metrics_from_mechanisms(tmp_path):
+    path = tmp_path / "metrics.prom"
+    with metrics.collect(str(path), interval=60) as registry:
+        DeferredAcceptance(example_cermat()).evaluate()
+        DeferredAcceptance(example_cermat()).evaluate()
+    assert metrics.active_registry() is None
+    runs = registry.counters[
+        ("admissions_runs_total", (("mechanism", "DeferredAcceptance"),))
+    ]
+    assert runs == 2
+    text = path.read_text()
+    assert "# TYPE admissions_proposals_total counter" in text
+    assert 'admissions_runs_total{mechanism="DeferredAcceptance"} 2' in text
+    assert 'admissions_max_rss_bytes{process="self"}' in text
+
+
+def test_metrics_from_simulations(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    instances = [random_example(seed=seed) for seed in range(3)]
+    mechanisms = [DeferredAcceptance, CermatMechanism, CutoffMechanism]
+    with metrics.collect(str(path), interval=0.01):
+        run_simulations(instances, mechanisms, jobs=2)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    last = records[-1]
+    assert last["counters"]["admissions_simulation_instances_total"] == 3
+    assert last["counters"]["admissions_simulation_tasks_total"] == 9
+    assert last["gauges"]["admissions_simulation_queue_depth"] == 0
+    assert last["counters"]['admissions_runs_total{mechanism="CutoffMechanism"}'] == 3
+    assert all("rates" in record for record in records[1:])
@@ -0,0 +1,34 @@
+import pytest
+from admissions import CermatMechanism, DeferredAcceptance
+from admissions.data import example_cermat
+from admissions.logger import TimingLogger
+from conftest import MECHANISMS, RecordingLogger
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_timing_logger(mechanism):
+    inner = RecordingLogger()
+    logger = TimingLogger(inner)
+    allocation = mechanism(example_cermat(), logger=logger).evaluate()
+    assert allocation == mechanism(example_cermat()).evaluate()
+    profile = logger.profile
+    assert profile.name == mechanism.__name__ == inner.name
+    assert profile.num_steps == len(inner.steps) > 0
+    assert set(profile.phases) == {"is_done", "step", "allocate", "logging"}
+    assert profile.total > 0 and sum(profile.steps) == pytest.approx(
+        profile.phases["step"]
+    )
+    assert profile.counters and all(n >= 0 for n in profile.counters.values())
+
+
+def test_domain_counters():
+    logger = TimingLogger()
+    DeferredAcceptance(example_cermat(), logger=logger).evaluate()
+    allocation = CermatMechanism(example_cermat(), logger=logger).evaluate()
+    da, cermat = logger.profiles
+    # every rejection in DA leads to a new proposal or to a fully rejected student
+    assert da.counters["proposals"] >= da.counters["rejections"] > 0
+    # students accepted at a school can be struck off later
+    num_accepted = sum(len(sts) for sts in allocation.accepted.values())
+    assert cermat.counters["acceptances"] >= num_accepted
+    assert cermat.counters["strike_offs"] > 0
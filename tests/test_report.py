@@ -0,0 +1,32 @@
+from admissions import CermatMechanism, DeferredAcceptance
+from admissions.data import example_3, example_cermat
+from admissions.report import PageCache, build_switcher, example_label
+
+mechanisms = {"DA": DeferredAcceptance, "Cermat": CermatMechanism}
+
+
+def test_parallel_report(tmp_path):
+    examples = [example_cermat, example_3]
+    serial = build_switcher(examples, mechanisms, jobs=1)
+    parallel = build_switcher(examples, mechanisms, jobs=2, cache_path=str(tmp_path))
+    assert list(parallel.keys()) == [example_label(ex) for ex in examples]
+    for ex_label in serial:
+        assert list(parallel[ex_label].keys()) == ["DA", "Cermat"]
+        for mech_label in mechanisms:
+            page = parallel[ex_label][mech_label].getvalue()
+            assert page == serial[ex_label][mech_label].getvalue()
+            assert "Průběh algoritmu" in page
+
+
+def test_page_cache(tmp_path):
+    examples = [example_cermat, example_3]
+    page_cache = PageCache(str(tmp_path))
+    first = build_switcher(examples, mechanisms, jobs=1, page_cache=page_cache)
+    assert (page_cache.hits, page_cache.misses) == (0, 4)
+    page_cache = PageCache(str(tmp_path))
+    second = build_switcher(examples, mechanisms, jobs=1, page_cache=page_cache)
+    assert (page_cache.hits, page_cache.misses) == (4, 0)
+    for ex_label in first:
+        for mech_label in mechanisms:
+            page = second[ex_label][mech_label].getvalue()
+            assert page == first[ex_label][mech_label].getvalue()
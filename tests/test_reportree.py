@@ -0,0 +1,51 @@
+import admissions.reportree as rt
+
+
+def example_switcher():
+    sw = rt.Switcher()
+    for example in ["A", "B"]:
+        for mechanism in ["x", "y"]:
+            doc = rt.Doc()
+            doc.line("p", f"{example}-{mechanism}")
+            sw[example][mechanism] = doc
+    return sw
+
+
+def test_switcher_pages():
+    html = example_switcher().to_buttons().getvalue()
+    assert html.count('class="content"') == 6
+    assert html.index('id="page_1"') < html.index("A-x") < html.index('id="page_2"')
+
+
+def test_lazy_switcher(tmp_path):
+    doc = rt.Doc(title="Lazy")
+    doc.switcher(example_switcher(), lazy=True)
+    doc.save(str(tmp_path))
+    index = (tmp_path / "index.html").read_text(encoding="utf-8")
+    assert "A-x" not in index and 'data-src="pages/page_1_1.js"' in index
+    assert "switcherFragment" in index
+    fragment = (tmp_path / "pages" / "page_2_1.js").read_text(encoding="utf-8")
+    assert fragment.startswith('switcherFragment("page_2_1", ') and "B-x" in fragment
+
+
+def test_asset_cache(tmp_path, monkeypatch):
+    import sass
+    from admissions.reportree import asset_cache
+
+    compiled = []
+    compile = sass.compile
+    monkeypatch.setattr(sass, "compile", lambda **kw: compiled.append(1) or compile(**kw))
+    monkeypatch.setattr(asset_cache, "_memory", {})
+    asset_cache.set_cache_dir(str(tmp_path))
+    try:
+        css = asset_cache.compiled_css(1200)
+        assert asset_cache.compiled_css(1200) == css
+        assert len(compiled) == 1
+        # a new process reads it from the disk
+        asset_cache._memory.clear()
+        assert asset_cache.compiled_css(1200) == css
+        assert len(compiled) == 1
+        asset_cache.compiled_css(1000)
+        assert len(compiled) == 2
+    finally:
+        asset_cache.set_cache_dir(None)
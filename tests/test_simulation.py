@@ -0,0 +1,12 @@
+from admissions import DeferredAcceptance, CermatMechanism, CutoffMechanism
+from admissions.data import example_cermat, random_example
+from admissions.simulation import run_simulations
+
+
+def test_run_simulations():
+    instances = [example_cermat()] + [random_example(seed=seed) for seed in range(3)]
+    mechanisms = [DeferredAcceptance, CermatMechanism, CutoffMechanism]
+    results = run_simulations(instances, mechanisms, jobs=2)
+    for data, allocations in zip(instances, results):
+        for mechanism, allocation in zip(mechanisms, allocations):
+            assert allocation == mechanism(data).evaluate()
@@ -0,0 +1,107 @@
+import pytest
+from admissions import AdmissionData, CermatMechanism, DeferredAcceptance
+from admissions.data import example_cermat, random_example
+from admissions.logger import (
+    BasicLogger,
+    GraphicLogger,
+    Logger,
+    MultiLogger,
+    TimingLogger,
+)
+from conftest import MECHANISMS, RecordingLogger
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_iter_steps(mechanism):
+    recorder = RecordingLogger()
+    expected = mechanism(example_cermat(), logger=recorder).evaluate()
+
+    mech = mechanism(example_cermat())
+    steps = mech.iter_steps()
+    # pause after the first step and resume with the same iterator
+    first = next(steps)
+    assert [first] + list(steps) == recorder.steps
+    assert mech.allocate() == expected
+
+    # a run can be abandoned at any step
+    abandoned = mechanism(example_cermat()).iter_steps()
+    next(abandoned)
+    abandoned.close()
+
+
+def test_multi_logger():
+    first, second, timing = RecordingLogger(), RecordingLogger(), TimingLogger()
+    logger = MultiLogger(first, second)
+    logger.attach(timing)
+    allocation = DeferredAcceptance(example_cermat(), logger=logger).evaluate()
+    assert first.name == second.name == timing.name == "DeferredAcceptance"
+    assert first.steps == second.steps and len(first.steps) > 0
+    assert first.allocation == second.allocation == allocation
+    assert timing.profile.num_steps == len(first.steps)
+
+
+def test_graphic_logger_renders_steps_immediately():
+    logger = GraphicLogger()
+    mech = CermatMechanism(example_cermat(), logger=logger)
+    logger.log_start(mech.admission_data)
+    step = next(mech.iter_steps())
+    logger.log_step(step)
+    assert logger.doc.getvalue() == ""
+    # the step is rendered already, later changes of its data do not matter
+    step.clear()
+    logger.log_end(mech.allocate())
+    assert "Krok 1" in logger.doc.getvalue()
+
+
+def test_graphic_logger_large_mode():
+    data = random_example(num_students=1000, num_schools=20, seats=40, seed=0)
+    logger = GraphicLogger()
+    allocation = DeferredAcceptance(data, logger=logger).evaluate()
+    assert logger._is_large and allocation == DeferredAcceptance(data).evaluate()
+    html = logger.doc.getvalue()
+    assert "Krok 2" in html and "showMoreRows" in html
+    # the full exam tables are not rendered
+    assert "exam-student" not in html
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS[:4])
+def test_graphic_logger_uneven_lists(mechanism):
+    # exam results and applications of different lengths, missing cells are empty
+    data = AdmissionData(
+        applications={1: ("A", "B"), 2: ("A",), 3: ("A",), 4: ("B",)},
+        exams={"A": (2, 1, 3), "B": (1, 4)},
+        seats={"A": 1, "B": 1},
+    )
+    logger = GraphicLogger()
+    assert mechanism(data, logger=logger).evaluate() == mechanism(data).evaluate()
+    html = logger.doc.getvalue()
+    assert "Krok 1" in html and "<td></td>" in html
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS[:4])
+def test_graphic_logger_reused(mechanism):
+    # the layout and the state of the step tables are built again for every run
+    logger = GraphicLogger()
+    mechanism(example_cermat(), logger=logger).evaluate()
+    html = logger.doc.getvalue()
+    mechanism(example_cermat(), logger=logger).evaluate()
+    assert logger.doc.getvalue() == html + html
+
+
+def test_consumes_steps():
+    assert not Logger().consumes_steps and BasicLogger().consumes_steps
+    assert not TimingLogger().consumes_steps
+    assert TimingLogger(BasicLogger()).consumes_steps
+    assert not MultiLogger(Logger(), TimingLogger()).consumes_steps
+    assert MultiLogger(Logger(), RecordingLogger()).consumes_steps
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_steps_without_snapshots(mechanism):
+    # loggers ignoring the step data get the same results without the snapshots
+    data = random_example(num_students=80, num_schools=6, seats=8, seed=5)
+    recording = RecordingLogger()
+    expected = mechanism(data, logger=recording).evaluate()
+    plain = mechanism(data, logger=Logger())
+    assert plain.evaluate() == expected
+    assert plain.num_steps == len(recording.steps)
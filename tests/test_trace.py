@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+import pytest
+from admissions import (
+    DeferredAcceptance,
+    NaiveMechanism,
+    SchoolOptimalSM,
+    StudentTrace,
+    TraceIndex,
+)
+from admissions.data import example_cermat, random_example
+from conftest import MECHANISMS, with_tuple_ids
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_trace_results(mechanism):
+    data = random_example(num_students=60, num_schools=6, seats=6, seed=3)
+    trace = StudentTrace()
+    allocation = mechanism(data, trace=trace).evaluate()
+    assert allocation == mechanism(data).evaluate()
+    index = trace.index()
+    assert len(index) == len(trace)
+    for sch, sts in allocation.accepted.items():
+        for st in sts:
+            last = index.history(st)[-1]
+            assert (last.event, last.school) == ("admitted", sch)
+    for st in allocation.rejected:
+        assert index.history(st)[-1].event == "unplaced"
+
+
+def test_trace_steps_unchanged():
+    data = example_cermat()
+    plain = list(DeferredAcceptance(data).iter_steps())
+    traced = DeferredAcceptance(data, trace=StudentTrace())
+    assert list(traced.iter_steps()) == plain
+    assert traced.num_steps == len(plain)
+
+
+def test_trace_history(tmp_path):
+    data = example_cermat()
+    trace = StudentTrace()
+    DeferredAcceptance(data, trace=trace).evaluate()
+    index = trace.index()
+    history = index.history("F")
+    assert [e.event for e in history[:2]] == ["applied", "held"]
+    assert history[0].school == data.applications["F"][0]
+    assert [e.step for e in history] == sorted(e.step for e in history)
+    rejected = [e for e in history if e.event == "rejected"]
+    assert rejected and all(e.rank > e.cutoff for e in rejected)
+    assert index.history("nobody") == []
+
+    path = str(tmp_path / "trace.npz")
+    index.save(path)
+    loaded = TraceIndex.load(path)
+    for st in data.applications:
+        assert loaded.history(st) == index.history(st)
+    assert "step 1: applied" in loaded.explain("F")
+
+
+def test_trace_tuple_ids(tmp_path):
+    # tuple ids are stored as JSON lists and restored on load
+    data = with_tuple_ids(example_cermat())
+    trace = StudentTrace()
+    DeferredAcceptance(data, trace=trace).evaluate()
+    index = trace.index()
+    path = str(tmp_path / "trace.npz")
+    index.save(path)
+    loaded = TraceIndex.load(path)
+    for st in data.applications:
+        assert loaded.history(st) == index.history(st) != []
+
+    index.students[0] = frozenset(index.students[0])
+    with pytest.raises(ValueError, match="Ids must be"):
+        index.save(path)
+
+
+@pytest.mark.parametrize("mechanism", ["NaiveMechanism", "SchoolOptimalSM"])
+def test_trace_does_not_depend_on_hash_seed(mechanism):
+    # string ids are hashed differently in every process with a different seed
+    code = f"""
+from admissions import {mechanism}, StudentTrace
+from admissions.data import example_1
+data = example_1()
+trace = StudentTrace()
+{mechanism}(data, trace=trace).evaluate()
+index = trace.index()
+print("\\n".join(index.explain(st) for st in data.applications))
+"""
+    outputs = set()
+    for seed in ["1", "2", "3"]:
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        )
+        outputs.add(out.stdout)
+    assert len(outputs) == 1
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from admissions import AdmissionData, DeferredAcceptance, InvalidAdmissionData
+from admissions.data import (
+    example_1,
+    example_2,
+    example_3,
+    example_4,
+    example_cermat,
+    random_example,
+)
+from conftest import MECHANISMS
+
+
+@pytest.mark.parametrize(
+    "example", [example_1, example_2, example_3, example_4, example_cermat]
+)
+def test_examples_are_valid(example):
+    assert example().validate().ok
+
+
+def test_random_example_is_clean():
+    assert not random_example(seed=0).validate().issues
+
+
+def test_validation_issues():
+    data = AdmissionData(
+        applications={"A": (1, 1), "B": (1, 3), "C": (2,)},
+        exams={1: ("A", "A", "B", "X"), 2: ("B",)},
+        seats={1: -1, 4: 1},
+    )
+    report = data.validate()
+    assert not report.ok
+    assert report.counts() == {
+        "duplicate_school": 1,
+        "unknown_school": 1,
+        "duplicate_student": 1,
+        "unknown_student": 1,
+        "not_applied": 1,
+        "not_in_exam": 1,
+        "missing_seats": 1,
+        "unknown_seats": 1,
+        "invalid_seats": 1,
+    }
+    assert {(i.student, i.school) for i in report.warnings} == {("C", 2), (None, 4)}
+    with pytest.raises(InvalidAdmissionData) as exc:
+        DeferredAcceptance(data)
+    assert exc.value.report == report
+
+
+def test_numpy_integer_seats_are_valid():
+    data = AdmissionData(
+        applications={1: ("A",), 2: ("A",)},
+        exams={"A": (2, 1)},
+        seats={"A": np.int64(1)},
+    )
+    assert data.validate().ok
+    assert DeferredAcceptance(data).evaluate().accepted["A"] == {2}
+    for seats in (True, 1.0, np.float64(1)):
+        data.seats["A"] = seats
+        assert data.validate().counts() == {"invalid_seats": 1}
+
+
+def test_validation_is_cached_on_frozen_data():
+    data = random_example(seed=1).freeze()
+    assert data.validate() is data.validate()
+    assert data.rename_students({0: "A"}).validate() is data.validate()
+
+
+@pytest.mark.parametrize("mechanism", MECHANISMS)
+def test_data_with_warnings_are_evaluated(mechanism):
+    # student 1 applied to A, but is missing in its exam results
+    data = AdmissionData(
+        applications={1: ("A", "B"), 2: ("A",), 3: ("B", "A")},
+        exams={"A": (2, 3), "B": (3, 1)},
+        seats={"A": 1, "B": 1},
+    )
+    report = data.validate()
+    assert report.ok and [issue.code for issue in report.issues] == ["not_in_exam"]
+    run = mechanism(data)
+    for _ in range(100):
+        if run.is_done():
+            break
+        run.step()
+    assert run.is_done(), "the run does not finish"
+    assert 1 not in run.allocate().accepted["A"]